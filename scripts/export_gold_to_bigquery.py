@@ -5,41 +5,38 @@ import argparse
 import sys
 from pathlib import Path
 
-sys.path.insert(0, "src")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
-from utils.io import get_paths, logger  # noqa: E402
+from utils.bigquery import (  # noqa: E402
+    DEFAULT_STAGING_PREFIX,
+    DEFAULT_WORKERS,
+    load_bigquery,
+    load_gold_parquets,
+)
+from utils.io import get_paths  # noqa: E402
 
 
-def _load_bigquery_client(project: str | None = None):
-    try:
-        from google.cloud import bigquery  # type: ignore
-    except ImportError as exc:  # pragma: no cover - optional dependency
-        raise RuntimeError(
-            "google-cloud-bigquery is required for this script."
-        ) from exc
-    return bigquery
-
-
-def export(dataset: str, project: str | None = None, location: str | None = None) -> None:
-    bigquery = _load_bigquery_client()
+def export(
+    dataset: str,
+    project: str | None = None,
+    location: str | None = None,
+    max_workers: int = DEFAULT_WORKERS,
+    staging_bucket: str | None = None,
+    staging_prefix: str = DEFAULT_STAGING_PREFIX,
+) -> None:
+    bigquery = load_bigquery()
     client = bigquery.Client(project=project)
-    gold_dir = get_paths().gold
-    for parquet in sorted(gold_dir.glob("*.parquet")):
-        table_id = f"{dataset}.{parquet.stem}"
-        logger.info("Uploading %s to %s", parquet.name, table_id)
-        job_config = bigquery.LoadJobConfig(
-            source_format=bigquery.SourceFormat.PARQUET,
-            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-        )
-        with parquet.open("rb") as handle:
-            load_job = client.load_table_from_file(
-                handle,
-                table_id=table_id,
-                location=location,
-                job_config=job_config,
-            )
-        load_job.result()
-        logger.info("Loaded %s rows into %s", load_job.output_rows, table_id)
+
+    load_gold_parquets(
+        client,
+        get_paths().gold,
+        dataset,
+        project=project,
+        location=location,
+        max_workers=max_workers,
+        staging_bucket=staging_bucket,
+        staging_prefix=staging_prefix,
+    )
 
 
 def main() -> None:
@@ -47,8 +44,22 @@ def main() -> None:
     parser.add_argument("dataset", help="BigQuery dataset name", default="retail_gold")
     parser.add_argument("--project", help="GCP project ID", default=None)
     parser.add_argument("--location", help="BigQuery location", default=None)
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_WORKERS, help="Concurrent load jobs")
+    parser.add_argument(
+        "--staging-bucket",
+        default=None,
+        help="GCS bucket used for staging; when set BigQuery loads from gs:// URIs",
+    )
+    parser.add_argument("--staging-prefix", default=DEFAULT_STAGING_PREFIX, help="Object prefix in the staging bucket")
     args = parser.parse_args()
-    export(args.dataset, project=args.project, location=args.location)
+    export(
+        args.dataset,
+        project=args.project,
+        location=args.location,
+        max_workers=args.max_workers,
+        staging_bucket=args.staging_bucket,
+        staging_prefix=args.staging_prefix,
+    )
 
 
 if __name__ == "__main__":
@@ -2,27 +2,50 @@
 from __future__ import annotations
 
 import sys
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, Iterable
 
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 
-sys.path.insert(0, "src")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
-from utils.io import get_paths, logger  # noqa: E402
+from utils.io import get_paths, logger, parquet_metadata  # noqa: E402
 
-PATHS = get_paths()
+NUMERIC_QC_COLUMNS = [
+    "aov",
+    "gross_margin_pct",
+    "return_rate_value",
+    "return_rate_units",
+]
+# Únicas columnas que consultan los checks; el resto no se decodifica
+QC_COLUMNS = ["period", "YearMonth", "Country", "net_sales", "returns_value", *NUMERIC_QC_COLUMNS]
+
+
+@lru_cache(maxsize=None)
+def _read_projected(path: str, mtime_ns: int) -> pd.DataFrame:
+    # mtime_ns forma parte de la clave: si el archivo cambia se vuelve a leer.
+    # El footer ya parseado se reutiliza (sin volver a leerlo del disco).
+    parquet = pq.ParquetFile(path, metadata=parquet_metadata(path))
+    columns = [c for c in QC_COLUMNS if c in parquet.schema_arrow.names]
+    return parquet.read(columns=columns).to_pandas()
 
 
 def _read_parquet_map() -> Dict[str, pd.DataFrame]:
-    gold_dir = PATHS.gold
+    gold_dir = get_paths().gold
     data = {}
     for parquet in gold_dir.glob("*.parquet"):
-        df = pd.read_parquet(parquet)
-        data[parquet.stem] = df
+        data[parquet.stem] = _read_projected(str(parquet), parquet.stat().st_mtime_ns)
     return data
 
 
+def _shape(name: str) -> tuple[int, int]:
+    metadata = parquet_metadata(get_paths().gold / f"{name}.parquet")
+    return metadata.num_rows, metadata.num_columns
+
+
 def _period_summary(df: pd.DataFrame) -> tuple[pd.Timestamp | None, pd.Timestamp | None]:
     if "period" not in df.columns:
         return None, None
@@ -33,12 +56,14 @@ def _period_summary(df: pd.DataFrame) -> tuple[pd.Timestamp | None, pd.Timestamp
 
 
 def _check_nan_inf(name: str, df: pd.DataFrame, columns: Iterable[str]) -> None:
-    for col in columns:
-        if col not in df.columns:
-            continue
-        series = pd.to_numeric(df[col], errors="coerce")
-        n_nan = series.isna().sum()
-        n_inf = np.isinf(series).sum()
+    cols_present = [c for c in columns if c in df.columns]
+    if not cols_present:
+        return
+    # Una sola conversión a float64 y dos reducciones por columna
+    values = df[cols_present].to_numpy(dtype=np.float64, na_value=np.nan)
+    nan_counts = np.count_nonzero(np.isnan(values), axis=0)
+    inf_counts = np.count_nonzero(np.isinf(values), axis=0)
+    for col, n_nan, n_inf in zip(cols_present, nan_counts, inf_counts):
         if n_nan or n_inf:
             logger.warning("[%s] Column '%s' has NaN=%s, Inf=%s", name, col, n_nan, n_inf)
 
@@ -46,16 +71,17 @@ def _check_nan_inf(name: str, df: pd.DataFrame, columns: Iterable[str]) -> None:
 def _check_country_vs_company(data: Dict[str, pd.DataFrame]) -> None:
     if "company_monthly_kpis" not in data or "country_monthly_kpis" not in data:
         return
-    company = data["company_monthly_kpis"].copy()
-    country = data["country_monthly_kpis"].copy()
+    company = data["company_monthly_kpis"]
+    country = data["country_monthly_kpis"]
     if "net_sales" not in company.columns or "net_sales" not in country.columns:
         return
-    comp = company.set_index("YearMonth")["net_sales"].astype(float)
-    ctry = (
-        country.groupby("YearMonth")["net_sales"].sum().astype(float)
-    )
-    mismatch = (comp.round(2) - ctry.round(2)).abs()
-    max_diff = mismatch.max()
+    # Alineación por YearMonth sobre ndarrays (sin aritmética de índices)
+    ctry = country.groupby("YearMonth", sort=True)["net_sales"].sum()
+    keys = company["YearMonth"].to_numpy()
+    comp = np.round(company["net_sales"].to_numpy(dtype=np.float64, na_value=np.nan), 2)
+    ctry_vals = np.round(ctry.reindex(keys).to_numpy(dtype=np.float64, na_value=np.nan), 2)
+    diff = np.abs(comp - ctry_vals)
+    max_diff = float(np.nanmax(diff)) if not np.isnan(diff).all() else np.nan
     if max_diff > 1.0:
         logger.error(
             "Company vs Country net_sales mismatch detected. Max diff %.2f", max_diff
@@ -69,21 +95,17 @@ def _check_country_vs_company(data: Dict[str, pd.DataFrame]) -> None:
 def _top_returns(country: pd.DataFrame, n: int = 5) -> None:
     if "returns_value" not in country.columns:
         return
-    top = (
-        country.sort_values("returns_value", ascending=False)
-        .head(n)[["Country", "YearMonth", "returns_value"]]
-    )
+    top = country.nlargest(n, "returns_value")[["Country", "YearMonth", "returns_value"]]
     logger.info("Top %s country-month returns:\n%s", n, top.to_string(index=False))
 
 
 def main() -> None:
     data = _read_parquet_map()
     if not data:
-        raise FileNotFoundError(f"No parquet outputs found in {PATHS.gold}")
+        raise FileNotFoundError(f"No parquet outputs found in {get_paths().gold}")
 
     for name, df in data.items():
-        rows = len(df)
-        cols = len(df.columns)
+        rows, cols = _shape(name)
         period_min, period_max = _period_summary(df)
         logger.info(
             "[QC] %s rows=%s cols=%s period=(%s → %s)",
@@ -93,16 +115,7 @@ def main() -> None:
             period_min.date() if period_min else "-",
             period_max.date() if period_max else "-",
         )
-        _check_nan_inf(
-            name,
-            df,
-            [
-                "aov",
-                "gross_margin_pct",
-                "return_rate_value",
-                "return_rate_units",
-            ],
-        )
+        _check_nan_inf(name, df, NUMERIC_QC_COLUMNS)
 
     _check_country_vs_company(data)
     if "country_monthly_kpis" in data:
@@ -2,19 +2,17 @@
 from __future__ import annotations
 
 import sys
-import yaml
+from pathlib import Path
 
-sys.path.insert(0, "src")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
-from run_pipeline import run_pipeline  # noqa: E402
-from utils.io import get_paths, logger  # noqa: E402
+from run_pipeline import CONFIG_PATH, _load_config, run_pipeline  # noqa: E402
+from utils.io import logger  # noqa: E402
 
 
 def _gold_targets() -> list[str]:
-    config_path = get_paths().configs / "artifacts.yml"
-    with config_path.open("r", encoding="utf-8") as fh:
-        cfg = yaml.safe_load(fh) or {}
-    artifacts = cfg.get("artifacts", {})
+    # Mismo parseo (cacheado) que usa run_pipeline
+    artifacts = _load_config(CONFIG_PATH)
     return [name for name, spec in artifacts.items() if spec.get("layer") == "gold"]
 
 
@@ -23,7 +21,8 @@ def main() -> None:
     if not targets:
         raise RuntimeError("No gold artifacts found in configuration")
     logger.info("Rebuilding gold parquet outputs: %s", ", ".join(targets))
-    run_pipeline(targets)
+    # Reconstrucción explícita: no se omiten tareas por estar al día
+    run_pipeline(targets, force=True)
 
 
 if __name__ == "__main__":
@@ -2,43 +2,43 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
 
-try:
-    from google.cloud import bigquery  # type: ignore
-except ImportError as exc:  # pragma: no cover - optional dependency
-    raise RuntimeError(
-        "google-cloud-bigquery debe estar instalado para ejecutar este script."
-    ) from exc
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
-from utils.io import get_paths, logger
+from utils.bigquery import (  # noqa: E402
+    DEFAULT_STAGING_PREFIX,
+    DEFAULT_WORKERS,
+    load_bigquery,
+    load_gold_parquets,
+)
+from utils.io import get_paths  # noqa: E402
 
-PATHS = get_paths()
 DEFAULT_DATASET = "retail_gold"
 
 
-def upload(dataset: str = DEFAULT_DATASET, project: str | None = None, location: str | None = None) -> None:
+def upload(
+    dataset: str = DEFAULT_DATASET,
+    project: str | None = None,
+    location: str | None = None,
+    max_workers: int = DEFAULT_WORKERS,
+    staging_bucket: str | None = None,
+    staging_prefix: str = DEFAULT_STAGING_PREFIX,
+) -> None:
+    bigquery = load_bigquery()
     client = bigquery.Client(project=project)
-    gold_dir = PATHS.gold
-    if not gold_dir.exists():
-        raise FileNotFoundError(f"No existe el directorio GOLD: {gold_dir}")
-
-    for parquet in sorted(gold_dir.glob("*.parquet")):
-        table_id = f"{dataset}.{parquet.stem}"
-        logger.info("Subiendo %s → %s", parquet.name, table_id)
-        job_config = bigquery.LoadJobConfig(
-            source_format=bigquery.SourceFormat.PARQUET,
-            write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-        )
-        with parquet.open("rb") as handle:
-            load_job = client.load_table_from_file(
-                handle,
-                table_id,
-                location=location,
-                job_config=job_config,
-            )
-        load_job.result()
-        logger.info("%s filas cargadas en %s", load_job.output_rows, table_id)
+
+    load_gold_parquets(
+        client,
+        get_paths().gold,
+        dataset,
+        project=project,
+        location=location,
+        max_workers=max_workers,
+        staging_bucket=staging_bucket,
+        staging_prefix=staging_prefix,
+    )
 
 
 def main(argv: list[str] | None = None) -> None:
@@ -46,9 +46,29 @@ def main(argv: list[str] | None = None) -> None:
     parser.add_argument("--dataset", default=DEFAULT_DATASET, help="Dataset destino (default retail_gold)")
     parser.add_argument("--project", default=None, help="ID de proyecto GCP")
     parser.add_argument("--location", default=None, help="Región BigQuery")
+    parser.add_argument(
+        "--max-workers", type=int, default=DEFAULT_WORKERS, help="Cargas concurrentes"
+    )
+    parser.add_argument(
+        "--staging-bucket",
+        default=None,
+        help="Bucket GCS para staging; si se indica, BigQuery carga desde gs://",
+    )
+    parser.add_argument(
+        "--staging-prefix",
+        default=DEFAULT_STAGING_PREFIX,
+        help="Prefijo de objetos en el bucket de staging",
+    )
     args = parser.parse_args(argv)
 
-    upload(dataset=args.dataset, project=args.project, location=args.location)
+    upload(
+        dataset=args.dataset,
+        project=args.project,
+        location=args.location,
+        max_workers=args.max_workers,
+        staging_bucket=args.staging_bucket,
+        staging_prefix=args.staging_prefix,
+    )
 
 
 if __name__ == "__main__":
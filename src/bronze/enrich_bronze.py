@@ -1,53 +1,210 @@
 # src/bronze/enrich_bronze.py
 # Agrega derivados contables a Bronze: Sales, COGS, GrossProfit, IsReturn, GrossMarginPct.
+# Entrada CSV crudo (o Parquet); salida dataset Parquet (Snappy) con columnas tipadas,
+# particionado estilo Hive por YearMonth (data/bronze/online_retail_enriched/YearMonth=AAAA-MM/).
 
 from pathlib import Path
+from typing import Iterator
 import argparse
+import shutil
+
 import numpy as np
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 DEF_INP = Path("data/bronze/online_retail_enriched.csv")
-# sobrescribe por defecto
-DEF_OUT = Path("data/bronze/online_retail_enriched.csv")
+DEF_OUT = Path("data/bronze/online_retail_enriched")
 
 REQ_COLS = [
     "InvoiceNo", "StockCode", "Description", "Quantity", "InvoiceDate",
     "UnitPrice", "CustomerID", "Country", "MarginPct", "UnitCost"
 ]
 
+# Tipos explícitos (evita que Arrow infiera StockCode/InvoiceNo como enteros)
+COL_TYPES = {
+    "InvoiceNo": pa.string(),
+    "StockCode": pa.string(),
+    "Description": pa.string(),
+    "Quantity": pa.int64(),
+    "UnitPrice": pa.float64(),
+    "CustomerID": pa.float64(),
+    "Country": pa.string(),
+    "MarginPct": pa.float64(),
+    "UnitCost": pa.float64(),
+}
+# Derivados con tipo fijo en el Parquet (IsReturn como booleano bit-packed)
+DERIVED_TYPES = {
+    "Sales": pa.float64(),
+    "COGS": pa.float64(),
+    "GrossProfit": pa.float64(),
+    "IsReturn": pa.bool_(),
+    "GrossMarginPct": pa.float64(),
+    "YearMonth": pa.string(),
+}
+PARTITION_COL = "YearMonth"
+# El CSV trae como texto las columnas numéricas y la fecha: una celda inválida
+# queda nula (como pd.to_numeric/to_datetime con errors="coerce") en vez de
+# abortar la lectura completa.
+CSV_TYPES = {**{name: pa.string() for name in COL_TYPES}, "InvoiceDate": pa.string()}
+NUMBER_PATTERN = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+# Formatos alternativos si la fecha no es ISO 8601 en todo el lote
+DATE_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%m/%d/%Y %H:%M",
+]
+BLOCK_BYTES = 64 << 20  # ~64 MB de CSV por lote
+BATCH_ROWS = 500_000
+
+
+def _replace(tbl: pa.Table, name: str, values) -> pa.Table:
+    return tbl.set_column(tbl.schema.get_field_index(name), name, values)
+
+
+def _to_float(col) -> np.ndarray:
+    return pc.cast(col, pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def _from_float(values: np.ndarray) -> pa.Array:
+    return pa.array(values, type=pa.float64(), from_pandas=True)
+
+
+def _coerce(col, typ: pa.DataType):
+    """Cast a ``typ``; si alguna celda no convierte, esas celdas quedan nulas."""
+    try:
+        return pc.cast(col, typ)
+    except pa.ArrowInvalid:
+        if not pa.types.is_string(col.type):
+            raise
+    text = pc.utf8_trim_whitespace(col)
+    valid = pc.match_substring_regex(text, NUMBER_PATTERN)
+    values = pc.cast(pc.if_else(valid, text, pa.scalar(None, pa.string())), pa.float64())
+    if pa.types.is_integer(typ):
+        # Cantidades no enteras (p. ej. "2.5") tampoco caben en int64
+        whole = pc.equal(pc.floor(values), values)
+        values = pc.if_else(whole, values, pa.scalar(None, pa.float64()))
+    return pc.cast(values, typ)
+
+
+def _parse_dates(col):
+    """Fechas a ``timestamp[s]``; las que no se reconocen quedan nulas."""
+    if pa.types.is_timestamp(col.type):
+        return col
+    try:
+        return pc.cast(col, pa.timestamp("s"))
+    except pa.ArrowInvalid:
+        if not pa.types.is_string(col.type):
+            raise
+    text = pc.utf8_trim_whitespace(col)
+    return pc.coalesce(*(
+        pc.strptime(text, format=fmt, unit="s", error_is_null=True)
+        for fmt in DATE_FORMATS
+    ))
+
+
+def _open_batches(inp: Path) -> tuple[pa.Schema, Iterator[pa.RecordBatch]]:
+    """Lectura por lotes (CSV o Parquet) para acotar la memoria pico."""
+    if inp.suffix == ".parquet":
+        pf = pq.ParquetFile(inp)
+        return pf.schema_arrow, pf.iter_batches(batch_size=BATCH_ROWS)
+    reader = pacsv.open_csv(
+        inp,
+        read_options=pacsv.ReadOptions(block_size=BLOCK_BYTES),
+        convert_options=pacsv.ConvertOptions(
+            column_types=CSV_TYPES,
+            strings_can_be_null=True,
+        ),
+    )
+    return reader.schema, iter(reader)
+
+
+def _normalize(tbl: pa.Table) -> pa.Table:
+    tbl = tbl.select([c for c in REQ_COLS if c in tbl.column_names])
+    for name, typ in COL_TYPES.items():
+        if name in tbl.column_names and tbl.schema.field(name).type != typ:
+            tbl = _replace(tbl, name, _coerce(tbl[name], typ))
+    return tbl
+
+
+def _enrich(tbl: pa.Table) -> pa.Table:
+    tbl = _normalize(tbl)
+
+    # Tipos seguros (fecha a día, precios/costos a 2 decimales)
+    dates = _parse_dates(tbl["InvoiceDate"])
+    tbl = _replace(tbl, "InvoiceDate", pc.floor_temporal(dates, unit="day"))
+    for col in ["UnitPrice", "UnitCost", "MarginPct"]:
+        tbl = _replace(tbl, col, pc.round(tbl[col], 2))
+
+    # Derivados contables (conservan signo de Quantity; retorna negativos).
+    # Se calculan en NumPy sobre buffers preasignados: una pasada por operación,
+    # sin temporales intermedios; los nulos viajan como NaN y vuelven a nulos.
+    q = _to_float(tbl["Quantity"])
+    sales = np.multiply(q, _to_float(tbl["UnitPrice"]))
+    cogs = np.multiply(q, _to_float(tbl["UnitCost"]))
+    gross_profit = np.subtract(sales, cogs)
+    is_return = pc.less(tbl["Quantity"], 0)
+
+    # % margen sobre la línea (nulo si Sales==0)
+    gross_margin_pct = np.full_like(sales, np.nan)
+    np.divide(gross_profit, sales, out=gross_margin_pct, where=sales != 0)
+
+    derived = {
+        "Sales": _from_float(sales),
+        "COGS": _from_float(cogs),
+        "GrossProfit": _from_float(gross_profit),
+        "IsReturn": is_return,
+        "GrossMarginPct": _from_float(gross_margin_pct),
+        # Clave de partición (AAAA-MM); fechas nulas → "NaT", como to_period("M")
+        # (una partición nula no se puede leer de vuelta con pandas)
+        "YearMonth": pc.fill_null(pc.strftime(tbl["InvoiceDate"], format="%Y-%m"), "NaT"),
+    }
+    for name, values in derived.items():
+        typ = DERIVED_TYPES[name]
+        if values.type != typ:
+            values = pc.cast(values, typ)
+        tbl = tbl.append_column(pa.field(name, typ), values)
+    return tbl
+
 
 def main(inp: Path, outp: Path):
     if not inp.exists():
         raise FileNotFoundError(f"No encuentro el archivo de entrada: {inp}")
 
-    df = pd.read_csv(inp)
-
-    # Tipos seguros
-    df["InvoiceDate"] = pd.to_datetime(df["InvoiceDate"], errors="coerce")
-    df["Quantity"] = pd.to_numeric(df["Quantity"], errors="coerce")
-    df["UnitPrice"] = pd.to_numeric(df["UnitPrice"], errors="coerce").round(2)
-    df["UnitCost"] = pd.to_numeric(df["UnitCost"], errors="coerce").round(2)
-    df["MarginPct"] = pd.to_numeric(df["MarginPct"], errors="coerce").round(2)
-
-    # Derivados contables (conservan signo de Quantity; retorna negativos)
-    df["Sales"] = df["Quantity"] * df["UnitPrice"]
-    df["COGS"] = df["Quantity"] * df["UnitCost"]
-    df["GrossProfit"] = df["Sales"] - df["COGS"]
-    df["IsReturn"] = df["Quantity"] < 0
-
-    # % margen sobre la línea (puede ser NaN si Sales==0)
-    df["GrossMarginPct"] = np.where(
-        df["Sales"] != 0, df["GrossProfit"] / df["Sales"], np.nan)
-
-    # Orden de columnas (original + nuevos al final si existen)
-    cols_orig = [c for c in REQ_COLS if c in df.columns]
-    cols_new = ["Sales", "COGS", "GrossProfit", "IsReturn", "GrossMarginPct"]
-    cols_out = cols_orig + [c for c in cols_new if c in df.columns]
-
-    # Exporta (fecha como YYYY-MM-DD)
-    outp.parent.mkdir(parents=True, exist_ok=True)
-    df[cols_out].to_csv(outp, index=False,
-                        date_format="%Y-%m-%d", encoding="utf-8")
+    schema, batches = _open_batches(inp)
+    out_schema = _enrich(schema.empty_table()).schema
+
+    # Exporta dataset Parquet (Snappy) particionado por mes. Solo se tocan los
+    # subdirectorios YearMonth=*: los meses reescritos se reemplazan
+    # (delete_matching) y luego se borran los que ya no aparecen en la entrada.
+    outp.mkdir(parents=True, exist_ok=True)
+    written: set[str] = set()
+    enriched = (
+        out_batch
+        for batch in batches
+        for out_batch in _enrich(pa.Table.from_batches([batch])).to_batches()
+    )
+    ds.write_dataset(
+        enriched,
+        outp,
+        schema=out_schema,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([out_schema.field(PARTITION_COL)]), flavor="hive"
+        ),
+        basename_template="part-{i}.parquet",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="snappy"),
+        existing_data_behavior="delete_matching",
+        preserve_order=True,
+        file_visitor=lambda written_file: written.add(Path(written_file.path).parent.name),
+    )
+    for stale in outp.glob(f"{PARTITION_COL}=*"):
+        if stale.is_dir() and stale.name not in written:
+            shutil.rmtree(stale)
     print(f"[OK] Bronze enriquecido → {outp}")
 
 
@@ -55,8 +212,8 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser(
         description="Enriquecer Bronze con métricas contables.")
     ap.add_argument("--in",  dest="inp",  default=str(DEF_INP),
-                    help="CSV de entrada (bronze).")
+                    help="CSV o Parquet de entrada (bronze).")
     ap.add_argument("--out", dest="outp", default=str(DEF_OUT),
-                    help="CSV de salida.")
+                    help="Directorio del dataset Parquet de salida.")
     args = ap.parse_args()
     main(Path(args.inp), Path(args.outp))
@@ -1,31 +1,70 @@
 # src/bronze/qc_bronze.py
+# Perfil de calidad de Bronze calculado con pyarrow.compute (sin pasar a pandas).
 from pathlib import Path
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 BASE = Path(__file__).resolve().parents[2]  # carpeta raíz del repo
-BRONZE = BASE / "data/bronze/online_retail_enriched.csv"
+BRONZE = BASE / "data/bronze/online_retail_enriched"
 OUTDIR = BASE / "reports/bronze_qc"
 OUTCSV = OUTDIR / "bronze_profile.csv"
 
+QC_COLS = ["InvoiceDate", "Quantity", "UnitPrice", "UnitCost", "CustomerID",
+           "Sales", "COGS", "GrossProfit"]
+SUMMARY_COLS = ["Sales", "COGS", "GrossProfit"]
+
+
+def _count(mask) -> int:
+    # sum de booleanos ignora nulos; None si la columna está vacía
+    return pc.sum(mask).as_py() or 0
+
+
+def _nulls(col) -> int:
+    return _count(pc.is_null(col, nan_is_null=True))
+
+
+def _describe(tbl: pa.Table) -> pd.DataFrame:
+    """Equivalente a ``DataFrame.describe()`` con kernels Arrow."""
+    stats = {}
+    for col in SUMMARY_COLS:
+        values = tbl[col]
+        q25, q50, q75 = pc.quantile(values, q=[0.25, 0.5, 0.75]).to_pylist()
+        stats[col] = {
+            "count": pc.count(values).as_py(),
+            "mean": pc.mean(values).as_py(),
+            "std": pc.stddev(values, ddof=1).as_py(),
+            "min": pc.min(values).as_py(),
+            "25%": q25,
+            "50%": q50,
+            "75%": q75,
+            "max": pc.max(values).as_py(),
+        }
+    return pd.DataFrame(stats, dtype="float64")
+
 
 def main():
     if not BRONZE.exists():
         raise FileNotFoundError(f"No encuentro: {BRONZE}")
 
     OUTDIR.mkdir(parents=True, exist_ok=True)
-    df = pd.read_csv(BRONZE, parse_dates=["InvoiceDate"])
+    tbl = pq.read_table(BRONZE, columns=QC_COLS)
+    dates = pc.min_max(tbl["InvoiceDate"])
+    min_date = pd.Timestamp(dates["min"].as_py())
+    max_date = pd.Timestamp(dates["max"].as_py())
 
     qc = {
-        "rows_total": [len(df)],
-        "nulls_InvoiceDate": [df["InvoiceDate"].isna().sum()],
-        "qty_negatives": [(df["Quantity"] < 0).sum()],
-        "prices_le_0": [(df["UnitPrice"] <= 0).sum()],
-        "costs_lt_0": [(df["UnitCost"] < 0).sum()],
-        "nulls_CustomerID": [df["CustomerID"].isna().sum()],
-        "min_date": [df["InvoiceDate"].min()],
-        "max_date": [df["InvoiceDate"].max()],
-        "grossprofit_nans": [df["GrossProfit"].isna().sum()],
+        "rows_total": [tbl.num_rows],
+        "nulls_InvoiceDate": [_nulls(tbl["InvoiceDate"])],
+        "qty_negatives": [_count(pc.less(tbl["Quantity"], 0))],
+        "prices_le_0": [_count(pc.less_equal(tbl["UnitPrice"], 0))],
+        "costs_lt_0": [_count(pc.less(tbl["UnitCost"], 0))],
+        "nulls_CustomerID": [_nulls(tbl["CustomerID"])],
+        "min_date": [min_date],
+        "max_date": [max_date],
+        "grossprofit_nans": [_nulls(tbl["GrossProfit"])],
     }
 
     pd.DataFrame(qc).to_csv(OUTCSV, index=False)
@@ -33,9 +72,8 @@ def main():
 
     # Muestra rápida en consola
     print("\nResumen rápido:")
-    print(df[["Sales", "COGS", "GrossProfit"]].describe().round(2))
-    print("Fechas:", df["InvoiceDate"].min().date(),
-          "→", df["InvoiceDate"].max().date())
+    print(_describe(tbl).round(2))
+    print("Fechas:", min_date.date(), "→", max_date.date())
 
 
 if __name__ == "__main__":
@@ -15,8 +15,36 @@ def _replace_nonfinite(value, fill_value: float = 0.0):
     return value
 
 
+def _is_numpy_numeric(value) -> bool:
+    return (
+        isinstance(value, pd.Series)
+        and isinstance(value.dtype, np.dtype)
+        and pd.api.types.is_numeric_dtype(value.dtype)
+    )
+
+
+def _safe_div_series(numerator: pd.Series, denominator, fill_value: float) -> pd.Series:
+    num = numerator.to_numpy(dtype=np.float64)
+    if isinstance(denominator, pd.Series):
+        den = denominator.to_numpy(dtype=np.float64)
+        name = numerator.name if denominator.name == numerator.name else None
+    else:
+        den = np.float64(denominator)
+        name = numerator.name
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.divide(num, den)
+    np.copyto(result, fill_value, where=~np.isfinite(result))
+    return pd.Series(result, index=numerator.index, name=name)
+
+
 def safe_div(numerator, denominator, fill_value: float = 0.0):
     """Safely divide and replace non-finite results with ``fill_value`` (defaults to 0)."""
+    # Fast path: Series numpy alineadas (o escalar) → división y guardia sobre ndarray
+    if _is_numpy_numeric(numerator) and (
+        (_is_numpy_numeric(denominator) and denominator.index.equals(numerator.index))
+        or (np.isscalar(denominator) and not isinstance(denominator, (str, bytes)))
+    ):
+        return _safe_div_series(numerator, denominator, fill_value)
     with np.errstate(divide="ignore", invalid="ignore"):
         result = numerator / denominator
     return _replace_nonfinite(result, fill_value=fill_value)
@@ -27,11 +55,162 @@ def ensure_period(df: pd.DataFrame, yearmonth_col: str = "YearMonth", period_col
     out = df.copy()
     if yearmonth_col not in out.columns:
         raise KeyError(f"Column '{yearmonth_col}' not found in DataFrame")
-    ym = out[yearmonth_col].astype(str).str.slice(0, 7)
-    out[period_col] = pd.to_datetime(ym + "-01", errors="coerce")
+    ym = out[yearmonth_col]
+    if isinstance(ym.dtype, pd.PeriodDtype):
+        out[period_col] = ym.dt.to_timestamp()
+    elif pd.api.types.is_datetime64_any_dtype(ym):
+        if ym.dt.tz is not None:
+            ym = ym.dt.tz_localize(None)
+        # Inicio de mes por aritmética datetime64[M] (sin PeriodArray intermedio)
+        out[period_col] = ym.to_numpy().astype("datetime64[M]").astype("datetime64[ns]")
+    else:
+        # Pocos meses distintos: se parsean solo los valores únicos
+        codes, uniques = pd.factorize(ym)
+        parsed = pd.to_datetime(
+            pd.Index(uniques).astype(str).str.slice(0, 7), format="%Y-%m", errors="coerce"
+        )
+        out[period_col] = parsed.take(codes, allow_fill=True, fill_value=pd.NaT).to_numpy()
     return out
 
 
+def year_month_labels(dates) -> np.ndarray:
+    """``YYYY-MM`` label per date (``"NaT"`` when missing), like ``dt.to_period("M").astype(str)``.
+
+    Dates are truncated with ``datetime64[M]`` arithmetic and only the distinct
+    months are formatted, instead of building and formatting one Period per row.
+    """
+    dates = pd.to_datetime(pd.Series(dates))
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    codes, months = pd.factorize(dates.to_numpy().astype("datetime64[M]"), use_na_sentinel=False)
+    return months.astype(str).astype(object)[codes]
+
+
+def group_nunique(group_codes, values, n_groups: int) -> np.ndarray:
+    """Distinct non-null ``values`` per group, given dense ``group_codes`` in ``[0, n_groups)``.
+
+    Values are factorized to integer codes and each (group, value) pair is packed
+    into one int64, so the count is a single ``np.unique`` plus ``np.bincount``
+    instead of a hash set per group.
+    """
+    group_codes = np.asarray(group_codes, dtype=np.int64)
+    item_codes, uniques = pd.factorize(pd.Series(values, copy=False), sort=False)
+    valid = item_codes >= 0
+    pairs = group_codes[valid] * max(len(uniques), 1) + item_codes[valid]
+    groups = np.unique(pairs) // max(len(uniques), 1)
+    return np.bincount(groups, minlength=n_groups)
+
+
+def _factorize_keys(df: pd.DataFrame, keys: list[str], sort: bool):
+    """Dense group codes for ``keys`` (nulls form their own group) and the key
+    values of each group, via one compound int64 key instead of a groupby."""
+    compound = np.zeros(len(df), dtype=np.int64)
+    levels = []
+    for key in keys:
+        codes, uniques = pd.factorize(df[key], sort=sort, use_na_sentinel=False)
+        compound = compound * len(uniques) + codes
+        levels.append(uniques)
+    codes, groups = pd.factorize(compound, sort=sort)
+    columns = {}
+    for key, uniques in zip(reversed(keys), reversed(levels)):
+        columns[key] = uniques.take(groups % len(uniques)).astype(df[key].dtype)
+        groups = groups // len(uniques)
+    return codes, {key: columns[key] for key in keys}
+
+
+def sales_returns_summary(
+    df: pd.DataFrame,
+    keys: str | list[str],
+    *,
+    distinct: dict[str, str] | None = None,
+    sort: bool = True,
+) -> pd.DataFrame:
+    """Aggregate net, sales-only and returns-only totals per ``keys`` in one pass.
+
+    Sales/returns metrics are row-masked on ``IsReturn`` instead of splitting the
+    frame; ``distinct`` maps output names to columns counted (nunique) over sales rows.
+    Keys are factorized once into dense int64 group codes shared by the sums and the
+    distinct counts; ``sort=False`` keeps groups in order of first appearance.
+    """
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    is_sale = ~df["IsReturn"].to_numpy(dtype=bool)
+    codes, out = _factorize_keys(df, keys, sort)
+    n_groups = len(next(iter(out.values())))
+
+    metrics = pd.DataFrame(
+        {
+            "net_sales": df["Sales"],
+            "cogs_net": df["COGS"],
+            "gp_net": df["GrossProfit"],
+            "items_sold": df["Quantity"].where(is_sale, 0),
+            "gmv": df["Sales"].where(is_sale, 0.0),
+            "returns_value": df["Sales"].where(~is_sale, 0.0),
+            "return_units_abs": df["Quantity"].where(~is_sale, 0),
+        }
+    )
+    # Suma agrupada sobre los códigos enteros (compensada, igual que por claves)
+    sums = metrics.groupby(codes, sort=True).sum()
+    sums[["returns_value", "return_units_abs"]] = sums[["returns_value", "return_units_abs"]].abs()
+    for name in sums.columns:
+        out[name] = sums[name].to_numpy()
+
+    if distinct:
+        # Conteos distintos sobre los mismos códigos de grupo, solo filas de venta
+        sale_codes = codes[is_sale]
+        has_sales = np.bincount(sale_codes, minlength=n_groups) > 0
+        for name, col in distinct.items():
+            counts = group_nunique(sale_codes, df[col].to_numpy()[is_sale], n_groups)
+            # Grupos sin ventas quedan nulos (como en un left join)
+            out[name] = counts if has_sales.all() else np.where(has_sales, counts, np.nan)
+    return pd.DataFrame(out)
+
+
+def pct_change_sorted(values, groups=None, fill_value: float = 0.0) -> np.ndarray:
+    """Row-over-row change ``x / x_prev - 1`` on data ordered by (group, period).
+
+    The first row of each group, rows with a null group and non-finite results
+    are set to ``fill_value``.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    change = np.full_like(values, fill_value)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(values[1:], values[:-1], out=change[1:])
+    change[1:] -= 1.0
+    if groups is not None:
+        codes, _ = pd.factorize(pd.Series(groups, copy=False))
+        starts = (codes[1:] != codes[:-1]) | (codes[1:] == -1)
+        change[1:][starts] = fill_value
+    change[~np.isfinite(change)] = fill_value
+    return change
+
+
+def round_inplace(
+    df: pd.DataFrame, cols: list[str], decimals: int, fill_value: float | None = None
+) -> pd.DataFrame:
+    """Round ``cols`` of ``df`` column by column, reusing each float64 buffer.
+
+    Avoids the intermediate frames of ``df[cols].round().fillna()``; non-float
+    columns keep their dtype (integers are already exact, only nulls are filled).
+    """
+    for col in cols:
+        series = df[col]
+        if series.dtype != np.float64:
+            if pd.api.types.is_float_dtype(series.dtype):
+                series = series.round(decimals)
+            if fill_value is not None and series.hasnans:
+                series = series.fillna(fill_value)
+            df[col] = series
+            continue
+        values = series.to_numpy()
+        if not values.flags.writeable:
+            values = values.copy()
+        np.round(values, decimals, out=values)
+        if fill_value is not None:
+            np.nan_to_num(values, copy=False, nan=fill_value, posinf=np.inf, neginf=-np.inf)
+        df[col] = values
+    return df
+
+
 def calc_aov(
     df: pd.DataFrame,
     *,
@@ -71,6 +250,11 @@ def calc_return_units(
 __all__ = [
     "safe_div",
     "ensure_period",
+    "year_month_labels",
+    "group_nunique",
+    "sales_returns_summary",
+    "pct_change_sorted",
+    "round_inplace",
     "calc_aov",
     "calc_return_rate_value",
     "calc_return_units",
@@ -4,10 +4,16 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
-from features.metrics import calc_aov, ensure_period, safe_div
+from features.metrics import (
+    calc_aov,
+    ensure_period,
+    pct_change_sorted,
+    safe_div,
+    sales_returns_summary,
+)
+from utils import schemas
 from utils.data import load_transactions
 from utils.io import get_paths, logger, write_parquet
-from utils.schemas import company_monthly_kpis_schema
 
 PATHS = get_paths()
 OUTPUT_PATH = PATHS.gold / "company_monthly_kpis.parquet"
@@ -15,38 +21,11 @@ OUTPUT_PATH = PATHS.gold / "company_monthly_kpis.parquet"
 
 def build_company_monthly() -> pd.DataFrame:
     df = load_transactions()
-    sales = df[~df["IsReturn"]].copy()
-    returns = df[df["IsReturn"]].copy()
-
-    grouped_all = df.groupby("YearMonth", dropna=False)
-    grouped_sales = sales.groupby("YearMonth", dropna=False)
-    grouped_returns = returns.groupby("YearMonth", dropna=False)
-
-    # Base (ventas netas/costos/margen)
-    monthly = grouped_all.agg(
-        net_sales=("Sales", "sum"),
-        cogs_net=("COGS", "sum"),
-        gp_net=("GrossProfit", "sum"),
-    ).reset_index()
-
-    # Solo ventas (no devoluciones)
-    monthly = monthly.merge(
-        grouped_sales.agg(
-            orders=("InvoiceNo", "nunique"),
-            customers=("CustomerID", lambda s: s.dropna().nunique()),
-            items_sold=("Quantity", "sum"),
-            gmv=("Sales", "sum"),
-        ).reset_index(),
-        on="YearMonth",
-        how="left",
+    # Una sola pasada agrupada (ventas/devoluciones enmascaradas por fila)
+    monthly = sales_returns_summary(
+        df, "YearMonth", distinct={"orders": "InvoiceNo", "customers": "CustomerID"}
     )
 
-    # Solo devoluciones (valor)
-    returns_metrics = grouped_returns.agg(
-        returns_value=("Sales", lambda s: np.abs(s.sum())),
-    ).reset_index()
-    monthly = monthly.merge(returns_metrics, on="YearMonth", how="left")
-
     # NAs y tipos
     for col in ["orders", "customers"]:
         monthly[col] = monthly[col].fillna(0).astype("Int64")
@@ -63,9 +42,8 @@ def build_company_monthly() -> pd.DataFrame:
         monthly["returns_value"], monthly["gmv"])
 
     # MoM global
-    monthly = monthly.sort_values("period").reset_index(drop=True)
-    monthly["net_sales_mom"] = monthly["net_sales"].pct_change()
-    monthly["net_sales_mom"] = safe_div(monthly["net_sales_mom"], 1.0)
+    monthly = monthly.sort_values("period", ignore_index=True)
+    monthly["net_sales_mom"] = pct_change_sorted(monthly["net_sales"])
 
     # Columnas finales
     cols = [
@@ -87,7 +65,7 @@ def build_company_monthly() -> pd.DataFrame:
     monthly = monthly[cols]
 
     # Validación + redondeos
-    monthly = company_monthly_kpis_schema.validate(monthly, lazy=True)
+    monthly = schemas.company_monthly_kpis_schema.validate(monthly, lazy=True)
 
     money_cols = [
         "gmv",
@@ -97,11 +75,11 @@ def build_company_monthly() -> pd.DataFrame:
         "gp_net",
         "aov",
     ]
-    monthly[money_cols] = monthly[money_cols].round(2)
+    two_dp = money_cols + ["items_sold"]
+    monthly[two_dp] = np.round(monthly[two_dp].to_numpy(dtype=np.float64, na_value=np.nan), 2)
     pct_cols = ["gross_margin_pct", "net_sales_mom", "return_rate_value"]
-    monthly[pct_cols] = monthly[pct_cols].round(4)
-    monthly[pct_cols] = monthly[pct_cols].fillna(0.0)
-    monthly["items_sold"] = monthly["items_sold"].round(2)
+    pct = np.round(monthly[pct_cols].to_numpy(dtype=np.float64, na_value=np.nan), 4)
+    monthly[pct_cols] = np.where(np.isnan(pct), 0.0, pct)
     monthly["aov"] = monthly["aov"].fillna(0.0)
 
     return monthly
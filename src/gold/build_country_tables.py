@@ -1,7 +1,6 @@
 """Build GOLD country-level KPI tables (monthly + snapshot)."""
 from __future__ import annotations
 
-import numpy as np
 import pandas as pd
 
 # ⬇️ utilidades que ya tienes en el repo
@@ -10,68 +9,57 @@ from features.metrics import (
     calc_return_rate_value,   # returns_value / gmv (safe)
     calc_return_units,        # añade return_units_abs y return_rate_units
     ensure_period,            # añade period (DATE) desde YearMonth
+    pct_change_sorted,        # MoM vectorizado sobre datos ya ordenados
+    round_inplace,            # redondeo por columna reutilizando el buffer
     safe_div,                 # división segura
+    sales_returns_summary,    # agregados netos/ventas/devoluciones en una pasada
 )
+from utils import schemas
 from utils.data import load_transactions
-from utils.io import get_paths, logger, write_parquet
-from utils.schemas import country_monthly_kpis_schema
+from utils.io import get_paths, logger, write_parquet_many
 
 PATHS = get_paths()
 COUNTRY_MONTHLY_PATH = PATHS.gold / "country_monthly_kpis.parquet"
 COUNTRY_SNAPSHOT_PATH = PATHS.gold / "country_kpis.parquet"
+KEYS = ["Country", "YearMonth"]
 
 
 def _normalize_country(df: pd.DataFrame) -> pd.DataFrame:
-    # Normaliza país nulo
+    # Normaliza país nulo y pasa las claves de agrupación a category
+    # (hash sobre códigos enteros; los subconjuntos por máscara las heredan)
     out = df.copy()
-    out["Country"] = out["Country"].fillna("Unspecified")
-    return out
+    # Strings respaldados por Arrow: fillna y factorización vectorizados (sin objetos Python)
+    out["Country"] = out["Country"].astype("string[pyarrow]").fillna("Unspecified")
+    for col in KEYS:
+        out[col] = out[col].astype("string[pyarrow]").astype("category")
+    # Quantity al entero más estrecho (exacto; las sumas agrupadas salen en int64).
+    # Importes siguen en float64: en float32 los céntimos no sobreviven a las sumas.
+    if pd.api.types.is_integer_dtype(out["Quantity"]):
+        out["Quantity"] = pd.to_numeric(out["Quantity"], downcast="integer")
+    # Orden único por códigos: los grupos quedan contiguos y los groupby
+    # posteriores pueden ir con sort=False
+    return out.sort_values(KEYS, kind="stable", ignore_index=True)
 
 
-def build_country_monthly(df: pd.DataFrame) -> pd.DataFrame:
-    df = _normalize_country(df)
+def _keys_to_str(df: pd.DataFrame, cols: list[str]) -> pd.DataFrame:
+    for col in cols:
+        df[col] = df[col].astype(str)
+    return df
 
-    # Split ventas vs devoluciones
-    sales = df[~df["IsReturn"]].copy()
-    returns = df[df["IsReturn"]].copy()
 
-    # Agrupaciones
-    g_all = df.groupby(["Country", "YearMonth"], dropna=False)
-    g_sales = sales.groupby(["Country", "YearMonth"], dropna=False)
-    g_ret = returns.groupby(["Country", "YearMonth"], dropna=False)
-
-    # Base neta (net_sales/cogs/gp incluyen signo)
-    monthly = g_all.agg(
-        net_sales=("Sales", "sum"),
-        cogs_net=("COGS", "sum"),
-        gp_net=("GrossProfit", "sum"),
-    ).reset_index()
+def build_country_monthly(df: pd.DataFrame) -> pd.DataFrame:
+    df = _normalize_country(df)
 
-    # Solo ventas (sin devoluciones)
-    monthly = monthly.merge(
-        g_sales.agg(
-            orders=("InvoiceNo", "nunique"),
-            customers=("CustomerID", lambda s: s.dropna().nunique()),
-            items_sold=("Quantity", "sum"),
-            gmv=("Sales", "sum"),
-        ).reset_index(),
-        on=["Country", "YearMonth"],
-        how="left",
+    # Base neta + ventas + devoluciones en una sola pasada agrupada
+    monthly = sales_returns_summary(
+        df, KEYS, distinct={"orders": "InvoiceNo", "customers": "CustomerID"}, sort=False
     )
-
-    # Solo devoluciones (valor y unidades)
-    ret_metrics = g_ret.agg(
-        returns_value=("Sales", lambda s: np.abs(s.sum())),
-        return_units_abs=("Quantity", lambda q: np.abs(q.sum())),
-    ).reset_index()
-
-    monthly = monthly.merge(
-        ret_metrics, on=["Country", "YearMonth"], how="left")
+    monthly = _keys_to_str(monthly, KEYS)
 
     # NAs y tipos
     monthly[["returns_value", "return_units_abs"]] = monthly[
         ["returns_value", "return_units_abs"]
-    ].fillna(0.0)
+    ].fillna(0.0).astype(float)
 
     for col in ["orders", "customers"]:
         monthly[col] = monthly[col].fillna(0).astype("Int64")
@@ -92,13 +80,12 @@ def build_country_monthly(df: pd.DataFrame) -> pd.DataFrame:
         monthly["gp_net"], monthly["net_sales"]
     )
 
-    # MoM por país
-    monthly = monthly.sort_values(["Country", "period"]).reset_index(drop=True)
-    monthly["net_sales_mom"] = monthly.groupby("Country")["net_sales"].pct_change()
-    monthly["net_sales_mom"] = safe_div(monthly["net_sales_mom"], 1.0)
+    # MoM por país: ``monthly`` ya sale ordenado por (Country, YearMonth)
+    monthly["net_sales_mom"] = pct_change_sorted(monthly["net_sales"], monthly["Country"])
 
-    # Share por mes (evita /0)
-    total_ns_m = monthly.groupby("YearMonth")["net_sales"].transform("sum")
+    # Share por mes (evita /0): total por mes agregado una vez y mapeado por clave
+    totals_m = monthly.groupby("YearMonth", sort=False)["net_sales"].sum()
+    total_ns_m = monthly["YearMonth"].map(totals_m)
     monthly["net_sales_share"] = safe_div(monthly["net_sales"], total_ns_m)
 
     # Orden de columnas
@@ -113,17 +100,16 @@ def build_country_monthly(df: pd.DataFrame) -> pd.DataFrame:
     monthly = monthly[cols]
 
     # Validación + redondeos
-    monthly = country_monthly_kpis_schema.validate(monthly, lazy=True)
+    monthly = schemas.country_monthly_kpis_schema.validate(monthly, lazy=True)
 
+    # Redondeo columna a columna sobre el propio buffer (sin frames intermedios)
     money_cols = ["gmv", "returns_value",
-                  "net_sales", "cogs_net", "gp_net", "aov"]
-    monthly[money_cols] = monthly[money_cols].round(2)
+                  "net_sales", "cogs_net", "gp_net"]
+    round_inplace(monthly, money_cols + ["return_units_abs", "items_sold"], 2)
+    round_inplace(monthly, ["aov"], 2, fill_value=0.0)
     pct_cols = ["gross_margin_pct", "net_sales_share", "net_sales_mom",
                 "return_rate_value", "return_rate_units"]
-    monthly[pct_cols] = monthly[pct_cols].round(4).fillna(0.0)
-    monthly["return_units_abs"] = monthly["return_units_abs"].round(2)
-    monthly["items_sold"] = monthly["items_sold"].round(2)
-    monthly["aov"] = monthly["aov"].fillna(0.0)
+    round_inplace(monthly, pct_cols, 4, fill_value=0.0)
 
     return monthly
 
@@ -131,32 +117,12 @@ def build_country_monthly(df: pd.DataFrame) -> pd.DataFrame:
 def build_country_snapshot(df: pd.DataFrame, monthly: pd.DataFrame) -> pd.DataFrame:
     df = _normalize_country(df)
 
-    sales = df[~df["IsReturn"]].copy()
-    returns = df[df["IsReturn"]].copy()
-
-    # Base neta (lifetime)
-    base = df.groupby("Country", dropna=False).agg(
-        net_sales=("Sales", "sum"),
-        cogs_net=("COGS", "sum"),
-        gp_net=("GrossProfit", "sum"),
-    ).reset_index()
-
-    # Solo ventas
-    sales_agg = sales.groupby("Country", dropna=False).agg(
-        gmv=("Sales", "sum"),
-        items_sold=("Quantity", "sum"),
-        orders=("InvoiceNo", "nunique"),
-        buyers=("CustomerID", lambda s: s.dropna().nunique()),
-    ).reset_index()
-
-    # Solo devoluciones
-    ret_agg = returns.groupby("Country", dropna=False).agg(
-        returns_value=("Sales", lambda s: np.abs(s.sum())),
-        return_units_abs=("Quantity", lambda q: np.abs(q.sum())),
-    ).reset_index()
-
-    snap = base.merge(sales_agg, on="Country", how="left").merge(
-        ret_agg, on="Country", how="left")
+    # Lifetime por país en una sola pasada (sumas sin redondear, no desde
+    # ``monthly`` que ya viene redondeado; orders/buyers distintos globales)
+    snap = sales_returns_summary(
+        df, "Country", distinct={"orders": "InvoiceNo", "buyers": "CustomerID"}, sort=False
+    )
+    snap = _keys_to_str(snap, ["Country"])
 
     # NAs
     snap[["gmv", "items_sold", "orders", "buyers", "returns_value", "return_units_abs"]] = snap[
@@ -166,11 +132,14 @@ def build_country_snapshot(df: pd.DataFrame, monthly: pd.DataFrame) -> pd.DataFr
     snap["orders"] = snap["orders"].astype("Int64")
     snap["buyers"] = snap["buyers"].astype("Int64")
 
-    # Rango de meses
-    first_last = monthly.groupby("Country", dropna=False).agg(
-        first_period=("YearMonth", "min"),
-        last_period=("YearMonth", "max"),
+    # Rango de meses: ``df`` ya viene ordenado por (Country, YearMonth), así que
+    # el primer/último mes de cada país salen de las transacciones sin recorrer
+    # ``monthly`` ni comparar strings
+    first_last = df.groupby("Country", observed=True, sort=False)["YearMonth"].agg(
+        first_period="first",
+        last_period="last",
     ).reset_index()
+    first_last = _keys_to_str(first_last, ["Country", "first_period", "last_period"])
     snap = snap.merge(first_last, on="Country", how="left")
 
     # Margen % y share total
@@ -181,14 +150,8 @@ def build_country_snapshot(df: pd.DataFrame, monthly: pd.DataFrame) -> pd.DataFr
 
     # Redondeos + orden
     money_cols = ["gmv", "returns_value", "net_sales", "cogs_net", "gp_net"]
-    snap[money_cols] = snap[money_cols].round(2)
-    snap[["items_sold", "return_units_abs"]] = snap[[
-        "items_sold", "return_units_abs"]].round(2)
-    snap[["gross_margin_pct", "net_sales_share_total"]] = (
-        snap[["gross_margin_pct", "net_sales_share_total"]]
-        .round(4)
-        .fillna(0.0)
-    )
+    round_inplace(snap, money_cols + ["items_sold", "return_units_abs"], 2)
+    round_inplace(snap, ["gross_margin_pct", "net_sales_share_total"], 4, fill_value=0.0)
 
     cols = [
         "Country", "first_period", "last_period",
@@ -210,8 +173,10 @@ def build_country_tables() -> dict[str, pd.DataFrame]:
 
 def main() -> dict[str, pd.DataFrame]:
     out = build_country_tables()
-    write_parquet(out["country_monthly_kpis"], COUNTRY_MONTHLY_PATH)
-    write_parquet(out["country_kpis"], COUNTRY_SNAPSHOT_PATH)
+    write_parquet_many({
+        COUNTRY_MONTHLY_PATH: out["country_monthly_kpis"],
+        COUNTRY_SNAPSHOT_PATH: out["country_kpis"],
+    })
     logger.info(
         "country_monthly_kpis rows=%s | country_kpis rows=%s",
         len(out["country_monthly_kpis"]), len(out["country_kpis"])
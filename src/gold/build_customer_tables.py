@@ -4,25 +4,26 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
-from features.metrics import ensure_period, safe_div
+from features.metrics import ensure_period, pct_change_sorted, safe_div
 from utils.data import load_transactions
-from utils.io import get_paths, read_csv, write_parquet, logger
+from utils.io import get_paths, logger, write_parquet_many
 
 PATHS = get_paths()
-SILVER_DIR = PATHS.silver
 GOLD_DIR = PATHS.gold
 
-SNAP_PATH = SILVER_DIR / "customers_snapshot.csv"
-MONTHLY_PATH = SILVER_DIR / "customers_monthly.csv"
 
 
 def _monthly_from_transactions(df: pd.DataFrame) -> pd.DataFrame:
-    sales = df[~df["IsReturn"]].copy()
-    returns = df[df["IsReturn"]].copy()
+    keys = ["CustomerID", "YearMonth"]
+    customer_dtype = df["CustomerID"].dtype
+    # Claves como category: agrupación sobre códigos enteros
+    df = df.assign(**{col: df[col].astype("category") for col in keys})
+    sales = df[~df["IsReturn"]]
+    returns = df[df["IsReturn"]]
 
-    grouped_all = df.groupby(["CustomerID", "YearMonth"], dropna=False)
-    grouped_sales = sales.groupby(["CustomerID", "YearMonth"], dropna=False)
-    grouped_returns = returns.groupby(["CustomerID", "YearMonth"], dropna=False)
+    grouped_all = df.groupby(keys, dropna=False, observed=True)
+    grouped_sales = sales.groupby(keys, dropna=False, observed=True)
+    grouped_returns = returns.groupby(keys, dropna=False, observed=True)
 
     monthly = grouped_all.agg(
         net_sales=("Sales", "sum"),
@@ -41,8 +42,8 @@ def _monthly_from_transactions(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     returns_metrics = grouped_returns.agg(
-        returns_value=("Sales", lambda s: np.abs(s.sum())),
-    ).reset_index()
+        returns_value=("Sales", "sum"),
+    ).abs().reset_index()
     monthly = monthly.merge(
         returns_metrics,
         on=["CustomerID", "YearMonth"],
@@ -53,14 +54,17 @@ def _monthly_from_transactions(df: pd.DataFrame) -> pd.DataFrame:
     monthly["orders"] = monthly["orders"].astype("Int64")
     for col in ["items_sold", "gmv", "returns_value"]:
         monthly[col] = monthly[col].fillna(0.0)
+    # Quantity llega en int32 desde Silver: las unidades se publican en int64
+    monthly["items_sold"] = monthly["items_sold"].astype(np.int64)
 
+    monthly["CustomerID"] = monthly["CustomerID"].astype(customer_dtype)
     monthly["YearMonth"] = monthly["YearMonth"].astype(str)
     return monthly
 
 
 def _snapshot_from_transactions(df: pd.DataFrame) -> pd.DataFrame:
-    sales = df[~df["IsReturn"]].copy()
-    returns = df[df["IsReturn"]].copy()
+    sales = df[~df["IsReturn"]]
+    returns = df[df["IsReturn"]]
 
     base = df.groupby("CustomerID", dropna=False).agg(
         net_sales=("Sales", "sum"),
@@ -77,8 +81,8 @@ def _snapshot_from_transactions(df: pd.DataFrame) -> pd.DataFrame:
     ).reset_index()
 
     returns_agg = returns.groupby("CustomerID", dropna=False).agg(
-        returns_value=("Sales", lambda s: np.abs(s.sum())),
-    ).reset_index()
+        returns_value=("Sales", "sum"),
+    ).abs().reset_index()
 
     snap = base.merge(sales_agg, on="CustomerID", how="left").merge(
         returns_agg, on="CustomerID", how="left")
@@ -87,6 +91,7 @@ def _snapshot_from_transactions(df: pd.DataFrame) -> pd.DataFrame:
         "orders", "items_sold", "gmv", "returns_value"
     ]].fillna(0.0)
     snap["orders"] = snap["orders"].astype("Int64")
+    snap["items_sold"] = snap["items_sold"].astype(np.int64)
 
     latest_purchase = sales_agg["last_purchase"].max()
     snap["recency_days"] = (latest_purchase - snap["last_purchase"]).dt.days
@@ -108,26 +113,7 @@ def _snapshot_from_transactions(df: pd.DataFrame) -> pd.DataFrame:
 # ---------- LECTURA SILVER ----------
 
 def read_silver():
-    if SNAP_PATH.exists() and MONTHLY_PATH.exists():
-        snap = read_csv(
-            SNAP_PATH,
-            parse_dates=["first_purchase", "last_purchase"],
-            dayfirst=False,
-        )
-        monthly = read_csv(
-            MONTHLY_PATH,
-            parse_dates=["last_purchase"],
-            dayfirst=False,
-        )
-        snap["CustomerID"] = snap["CustomerID"].astype("string").str.strip()
-        monthly["CustomerID"] = monthly["CustomerID"].astype("string").str.strip()
-        if "YearMonth" in monthly.columns:
-            monthly["YearMonth"] = monthly["YearMonth"].astype(str)
-        return snap, monthly
-
-    logger.warning(
-        "No encuentro tablas silver de clientes; recalculo desde transactions_base."
-    )
+    """Snapshot y mensual por cliente desde transactions_base (lectura cacheada)."""
     tx = load_transactions()
     monthly = _monthly_from_transactions(tx)
     snap = _snapshot_from_transactions(tx)
@@ -140,58 +126,72 @@ def rfm_scores(df: pd.DataFrame) -> pd.DataFrame:
     """Calcula scores R, F, M (1..5). R invertido (1 peor recency, 5 mejor)."""
     out = df.copy()
 
-    def safe_qcut(s, q, labels):
+    def safe_qcut(s, q=5):
         # Soporta casos con poca cardinalidad
         if s.nunique(dropna=True) < q:
-            ranks = s.rank(method="average", pct=True)
-            bins = pd.qcut(ranks, q, labels=labels, duplicates="drop")
-            return bins.astype(int)
-        return pd.qcut(s, q, labels=labels, duplicates="drop").astype(int)
+            s = s.rank(method="average", pct=True)
+        # Mismos bordes que pd.qcut (percentiles lineales, intervalos (a, b] con
+        # el mínimo incluido) asignados con searchsorted; bordes repetidos se
+        # descartan y los scores quedan consecutivos desde 1
+        values = s.to_numpy(dtype=np.float64)
+        if not len(values):
+            return np.empty(0, dtype=np.int8)
+        edges = np.unique(np.percentile(values, np.linspace(0, 1, q + 1) * 100))
+        scores = np.searchsorted(edges, values, side="left")
+        return np.clip(scores, 1, None).astype(np.int8)
 
     out["R_score"] = safe_qcut(
-        -out["recency_days"].fillna(out["recency_days"].max()), 5, labels=[1, 2, 3, 4, 5]
+        -out["recency_days"].fillna(out["recency_days"].max()))
+    out["F_score"] = safe_qcut(out["frequency"].fillna(0))
+    out["M_score"] = safe_qcut(out["monetary"].fillna(0))
+
+    # Scores en int8; el compuesto (hasta 555) en int16 sobre los ndarrays
+    rfm = out["R_score"].to_numpy().astype(np.int16) * 100
+    rfm += out["F_score"].to_numpy().astype(np.int16) * 10
+    rfm += out["M_score"].to_numpy()
+    out["RFM_score"] = rfm
+
+    # Segmentos vectorizados: la primera condición que se cumple gana
+    r = out["R_score"].to_numpy()
+    f = out["F_score"].to_numpy()
+    m = out["M_score"].to_numpy()
+    conditions = [
+        (r >= 4) & (f >= 4) & (m >= 4),
+        (r >= 4) & (f >= 3),
+        (r >= 3) & (m >= 4),
+        (r <= 2) & (f <= 2),
+        (r >= 4) & (f <= 2),
+    ]
+    segments = ["Champions", "Loyal", "Big Spenders", "At Risk", "Potential Loyalist"]
+    out["segment"] = pd.Categorical(
+        np.select(conditions, segments, default="Regular"),
+        categories=segments + ["Regular"],
     )
-    out["F_score"] = safe_qcut(
-        out["frequency"].fillna(0), 5, labels=[1, 2, 3, 4, 5])
-    out["M_score"] = safe_qcut(
-        out["monetary"].fillna(0), 5, labels=[1, 2, 3, 4, 5])
-
-    out["RFM_score"] = out["R_score"] * 100 + \
-        out["F_score"] * 10 + out["M_score"]
-
-    def segment_row(r, f, m):
-        if r >= 4 and f >= 4 and m >= 4:
-            return "Champions"
-        if r >= 4 and f >= 3:
-            return "Loyal"
-        if r >= 3 and m >= 4:
-            return "Big Spenders"
-        if r <= 2 and f <= 2:
-            return "At Risk"
-        if r >= 4 and f <= 2:
-            return "Potential Loyalist"
-        return "Regular"
-
-    out["segment"] = [segment_row(r, f, m) for r, f, m in zip(
-        out["R_score"], out["F_score"], out["M_score"])]
+    # Tipos estrechos solo en el cálculo: la tabla publicada conserva int64
+    score_cols = ["R_score", "F_score", "M_score", "RFM_score"]
+    out[score_cols] = out[score_cols].astype(np.int64)
     return out
 
 
 def estimate_clv(monthly: pd.DataFrame, horizon_months: int = 12) -> pd.DataFrame:
     """CLV simple: promedio de ventas netas de los últimos 3 meses * horizonte."""
-    m = monthly.copy()
-    m["YearMonth"] = pd.to_datetime(m["YearMonth"] + "-01")
-    m = m.sort_values(["CustomerID", "YearMonth"])
-    m["net_sales_last3m_avg"] = (
-        m.groupby("CustomerID")["net_sales"]
-         .rolling(3, min_periods=1).mean()
-         .reset_index(level=0, drop=True)
-    )
-    clv = (
-        m.groupby("CustomerID")
-         .tail(1)[["CustomerID", "net_sales_last3m_avg"]]
-         .rename(columns={"net_sales_last3m_avg": "clv_monthly_avg"})
+    # Mes parseado solo sobre valores únicos; cliente como Categorical para
+    # agrupar por códigos enteros (el orden ya lo fija el sort_values)
+    m = ensure_period(monthly[["CustomerID", "YearMonth", "net_sales"]], "YearMonth", "period")
+    m = m[m["CustomerID"].notna()].sort_values(["CustomerID", "period"])
+    customer = m["CustomerID"].astype("category")
+
+    # Solo importa la última ventana de cada cliente: media directa de sus
+    # (hasta) 3 últimos meses, sin serie rolling completa ni MultiIndex
+    from_last = m.groupby(customer, observed=True, sort=False).cumcount(ascending=False).to_numpy()
+    last3 = from_last < 3
+    avg = (
+        m.loc[last3, "net_sales"]
+         .groupby(customer[last3], observed=True, sort=False)
+         .mean()
     )
+    clv = m.loc[from_last == 0, ["CustomerID"]]
+    clv["clv_monthly_avg"] = avg.to_numpy()
     clv["clv_12m_est"] = clv["clv_monthly_avg"].clip(lower=0) * horizon_months
     return clv
 
@@ -204,8 +204,7 @@ def churn_risk_from_recency(recency_days: pd.Series) -> pd.Series:
 
 
 def build_customer_kpis(snapshot: pd.DataFrame, monthly: pd.DataFrame) -> pd.DataFrame:
-    snap = snapshot.copy()
-    snap = rfm_scores(snap)
+    snap = rfm_scores(snapshot)  # ya devuelve una copia
     clv = estimate_clv(monthly, horizon_months=12)
     out = snap.merge(clv, on="CustomerID", how="left")
     out["churn_risk"] = churn_risk_from_recency(out["recency_days"])
@@ -244,17 +243,14 @@ def build_customer_kpis(snapshot: pd.DataFrame, monthly: pd.DataFrame) -> pd.Dat
 # ---------- GOLD: Customer Monthly KPIs (con period, aov y MoM) ----------
 
 def build_customer_monthly_kpis(monthly: pd.DataFrame) -> pd.DataFrame:
-    m = monthly.copy()
+    # period (DATE) desde YearMonth; ensure_period ya devuelve una copia
+    m = ensure_period(monthly, "YearMonth", "period")
 
     # Asegura tipos
     m["CustomerID"] = m["CustomerID"].astype("string").str.strip()
     m["YearMonth"] = m["YearMonth"].astype(str)
 
-    # period (DATE) desde YearMonth
-    m = ensure_period(m, "YearMonth", "period")
-
     # AOV y Gross Margin %
-    # (Asumimos que net_sales, orders, gp_net existen en customers_monthly silver)
     if "aov" not in m.columns:
         m["aov"] = safe_div(m.get("net_sales", 0.0), m.get("orders", 0))
     m["gross_margin_pct"] = safe_div(
@@ -262,11 +258,8 @@ def build_customer_monthly_kpis(monthly: pd.DataFrame) -> pd.DataFrame:
 
     # MoM por cliente (net_sales)
     m = m.sort_values(["CustomerID", "period"]).reset_index(drop=True)
-    m["net_sales_mom"] = (
-        m.groupby("CustomerID")["net_sales"]
-         .pct_change()
-         .replace([np.inf, -np.inf], np.nan)
-    )
+    m["net_sales_mom"] = pct_change_sorted(
+        m["net_sales"], m["CustomerID"], fill_value=np.nan)
 
     # Columnas finales (ajusta si tu silver trae nombres distintos)
     m = m.rename(columns={"CustomerID": "customer_id"})
@@ -299,55 +292,47 @@ def build_customer_monthly_kpis(monthly: pd.DataFrame) -> pd.DataFrame:
 # ---------- GOLD: Retención mensual ----------
 
 def monthly_retention_table(monthly: pd.DataFrame) -> pd.DataFrame:
-    m = monthly.copy()
-    # Normaliza YearMonth a timestamp (primer día de mes)
-    m["YearMonth"] = pd.PeriodIndex(
-        m["YearMonth"].astype(str), freq="M").to_timestamp()
-    m = m.sort_values(["CustomerID", "YearMonth"])
-
-    first_month = m.groupby("CustomerID")[
-        "YearMonth"].min().rename("first_month")
-    m = m.merge(first_month, on="CustomerID", how="left")
-
-    active = m.groupby(["YearMonth", "CustomerID"]
-                       ).size().reset_index(name="active")
-    active["active"] = 1
-
-    pivot = active.pivot(index="CustomerID", columns="YearMonth",
-                         values="active").fillna(0).astype(int)
-    months = list(pivot.columns)
-
-    rows = []
-    for i, month in enumerate(months):
-        current = pivot[month] == 1
-        active_customers = int(current.sum())
-        is_new = (first_month == month).reindex(pivot.index).fillna(False)
-        new_customers = int(is_new[current].sum())
-
-        if i == 0:
-            retained = 0
-            reactivated = 0
-            churned = 0
-        else:
-            prev_month = months[i - 1]
-            prev = pivot[prev_month] == 1
-            retained = int((current & prev).sum())
-            reactivated = int(
-                (current & ~prev & (pivot.iloc[:, :i].sum(axis=1) > 0)).sum())
-            churned = int((prev & ~current).sum())
-
-        rows.append(
-            {
-                "period": month,  # DATE-like (timestamp mensual)
-                "active_customers": active_customers,
-                "new_customers": new_customers,
-                "retained": retained,
-                "reactivated": reactivated,
-                "churned": churned,
-            }
-        )
-
-    return pd.DataFrame(rows)
+    # Actividad como pares (cliente, mes) únicos, ordenados por cliente y mes:
+    # memoria proporcional a los meses activos, no a clientes x meses. Cada par
+    # se compara con el mes activo anterior del mismo cliente.
+    # Sin cliente no hay actividad: esas filas no aportan pares ni meses
+    cust_codes, _ = pd.factorize(monthly["CustomerID"])
+    valid = cust_codes >= 0
+    cust_codes = cust_codes[valid]
+    # Meses como códigos enteros ordenados: solo los valores distintos pasan a
+    # string/Period, las filas se quedan en enteros
+    raw_codes, raw_months = pd.factorize(
+        monthly["YearMonth"].to_numpy()[valid], use_na_sentinel=False)
+    months = pd.Index(raw_months).astype(str)
+    order = np.argsort(months.to_numpy(), kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    month_codes = rank[raw_codes]
+    months = months[order]
+    n_months = len(months)
+    pairs = np.unique(cust_codes.astype(np.int64) * n_months + month_codes)
+    cust, month = np.divmod(pairs, max(n_months, 1))
+
+    first = np.ones(len(pairs), dtype=bool)
+    first[1:] = cust[1:] != cust[:-1]
+    gap = np.diff(month, prepend=-1)
+
+    active = np.bincount(month, minlength=n_months)
+    retained = np.bincount(month[~first & (gap == 1)], minlength=n_months)
+    churned = np.zeros(n_months, dtype=np.int64)
+    churned[1:] = active[:-1] - retained[1:]
+
+    return pd.DataFrame(
+        {
+            # DATE-like (timestamp mensual)
+            "period": pd.PeriodIndex(months, freq="M").to_timestamp(),
+            "active_customers": active,
+            "new_customers": np.bincount(month[first], minlength=n_months),
+            "retained": retained,
+            "reactivated": np.bincount(month[~first & (gap > 1)], minlength=n_months),
+            "churned": churned,
+        }
+    )
 
 
 # ---------- ORQUESTACIÓN Y EXPORT ----------
@@ -366,9 +351,10 @@ def build_customer_tables() -> dict[str, pd.DataFrame]:
 
 def main() -> dict[str, pd.DataFrame]:
     outputs = build_customer_tables()
-    write_parquet(outputs["customer_kpis"], GOLD_DIR / "customer_kpis.parquet")
-    write_parquet(outputs["customer_retention_monthly"],
-                  GOLD_DIR / "customer_retention_monthly.parquet")
+    write_parquet_many({
+        GOLD_DIR / "customer_kpis.parquet": outputs["customer_kpis"],
+        GOLD_DIR / "customer_retention_monthly.parquet": outputs["customer_retention_monthly"],
+    })
     logger.info(
         "customer_kpis=%s | customer_retention_monthly=%s",
         len(outputs["customer_kpis"]),
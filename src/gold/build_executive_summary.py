@@ -12,15 +12,16 @@ OUTPUT_PATH = PATHS.gold / "executive_summary.parquet"
 
 
 def build_executive_summary(df: pd.DataFrame | None = None) -> pd.DataFrame:
-    company = df.copy() if df is not None else pd.read_parquet(COMPANY_MONTHLY)
+    company = df if df is not None else pd.read_parquet(COMPANY_MONTHLY)
     if company.empty:
         raise ValueError("company_monthly_kpis está vacío; ejecuta build_company_monthly_kpis primero.")
-    company["YearMonth"] = company["YearMonth"].astype(str)
+    # Solo se lee la entrada: YearMonth normalizado en una Serie local, sin copiar el frame
+    year_month = company["YearMonth"].astype(str)
     summary = pd.DataFrame(
         {
-            "first_period": [company["YearMonth"].min()],
-            "last_period": [company["YearMonth"].max()],
-            "months": [company["YearMonth"].nunique()],
+            "first_period": [year_month.min()],
+            "last_period": [year_month.max()],
+            "months": [year_month.nunique()],
             "orders": [company["orders"].sum()],
             "customers": [company["customers"].sum()],
             "items_sold": [company["items_sold"].sum()],
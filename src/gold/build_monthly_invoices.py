@@ -6,54 +6,87 @@ from pathlib import Path
 
 import numpy as np
 import pandas as pd
+import pyarrow.dataset as ds
 
 from features.metrics import ensure_period, safe_div
-from utils.data import load_transactions
-from utils.io import get_paths, logger, write_parquet
+from utils.io import get_paths, logger, read_csv, write_parquet
 
 PATHS = get_paths()
-DEFAULT_INPUT = PATHS.silver / "transactions_base.csv"
+DEFAULT_INPUT = PATHS.silver / "transactions_base.parquet"
 DEFAULT_OUTPUT = PATHS.gold / "revenue_monthly.parquet"
+# Columnas que necesita el agregado mensual (proyección al leer el Parquet)
+REVENUE_COLUMNS = ["InvoiceNo", "InvoiceDate", "Quantity", "UnitPrice", "UnitCost", "IsReturn"]
+BATCH_ROWS = 1_000_000
 
 
-def build_revenue_monthly(df: pd.DataFrame | None = None) -> pd.DataFrame:
-    tx = df.copy() if df is not None else load_transactions()
-
+def _revenue_partials(tx: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Per-month line sums and distinct (month, invoice) pairs for one block of rows."""
     if "InvoiceDate" not in tx.columns:
         raise ValueError("transactions_base must include 'InvoiceDate'.")
 
-    tx["InvoiceDate"] = pd.to_datetime(tx["InvoiceDate"], errors="raise")
-    tx["YearMonth"] = tx["InvoiceDate"].dt.to_period("M").astype(str)
-
-    if "IsReturn" not in tx.columns:
-        tx["IsReturn"] = tx["Quantity"] < 0
-
-    sales = tx[~tx["IsReturn"]].copy()
-    returns = tx[tx["IsReturn"]].copy()
-
-    sales["sales_gross_line"] = sales["Quantity"] * sales["UnitPrice"]
-    sales["cogs_line"] = sales["Quantity"] * sales["UnitCost"]
-    returns["returns_gross_ln"] = np.abs(returns["Quantity"] * returns["UnitPrice"])
-    returns["cogs_ret_ln"] = np.abs(returns["Quantity"] * returns["UnitCost"])
-
-    sales_agg = sales.groupby("YearMonth").agg(
-        sales_gross=("sales_gross_line", "sum"),
-        cogs_sales=("cogs_line", "sum"),
-        orders=("InvoiceNo", "nunique"),
-    )
-
-    returns_agg = returns.groupby("YearMonth").agg(
-        returns_gross=("returns_gross_ln", "sum"),
-        cogs_returns=("cogs_ret_ln", "sum"),
-        credit_notes=("InvoiceNo", "nunique"),
-    )
-
-    monthly = (
-        sales_agg.join(returns_agg, how="outer")
-        .fillna(0.0)
-        .reset_index()
-        .sort_values("YearMonth")
+    invoice_date = pd.to_datetime(tx["InvoiceDate"], errors="raise")
+    # YearMonth como Categorical ordenado: solo se formatean los meses distintos
+    # y el groupby agrupa por códigos enteros en lugar de hashear strings
+    if invoice_date.dt.tz is not None:
+        invoice_date = invoice_date.dt.tz_localize(None)
+    codes, months = pd.factorize(invoice_date.to_numpy().astype("datetime64[M]"), sort=True)
+    year_month = pd.Categorical.from_codes(codes, months.astype(str))
+
+    is_return = tx["IsReturn"] if "IsReturn" in tx.columns else tx["Quantity"] < 0
+
+    # Líneas calculadas una vez y enmascaradas venta/devolución
+    # (sin copiar dos subconjuntos ni unirlos después)
+    is_sale = ~is_return.to_numpy(dtype=bool)
+    quantity = tx["Quantity"].to_numpy(dtype=np.float64)
+    line = quantity * tx["UnitPrice"].to_numpy(dtype=np.float64)
+    cost_line = quantity * tx["UnitCost"].to_numpy(dtype=np.float64)
+    sums = pd.DataFrame(
+        {
+            "YearMonth": year_month,
+            "sales_gross": np.where(is_sale, line, 0.0),
+            "cogs_sales": np.where(is_sale, cost_line, 0.0),
+            "returns_gross": np.where(is_sale, 0.0, np.abs(line)),
+            "cogs_returns": np.where(is_sale, 0.0, np.abs(cost_line)),
+        }
+    ).groupby("YearMonth", observed=True).sum()
+    sums.index = sums.index.astype(str)
+
+    # Facturas distintas por mes; se cuentan al final para que los conteos
+    # sean exactos aunque una factura aparezca en varios bloques
+    invoices = pd.DataFrame(
+        {"YearMonth": year_month, "InvoiceNo": tx["InvoiceNo"].to_numpy(), "is_sale": is_sale}
+    ).dropna().drop_duplicates()
+    invoices["YearMonth"] = invoices["YearMonth"].astype(str)
+    return sums, invoices
+
+
+def _scan_partials(path: str | Path):
+    """Stream the silver Parquet in batches, reading only the revenue columns."""
+    logger.info("Reading Parquet (batches of %s rows): %s", BATCH_ROWS, path)
+    dataset = ds.dataset(path, format="parquet")
+    columns = [c for c in REVENUE_COLUMNS if c in dataset.schema.names]
+    for batch in dataset.to_batches(columns=columns, batch_size=BATCH_ROWS):
+        yield _revenue_partials(batch.to_pandas())
+
+
+def build_revenue_monthly(
+    df: pd.DataFrame | None = None, *, path: str | Path = DEFAULT_INPUT
+) -> pd.DataFrame:
+    # Sin DataFrame se recorre ``path`` por lotes: memoria pico acotada por
+    # lote + acumulados mensuales, no por el tamaño de transactions_base
+    partials = [_revenue_partials(df)] if df is not None else list(_scan_partials(path))
+    if not partials:
+        raise ValueError(f"No hay transacciones en {path}.")
+
+    sums = pd.concat([p[0] for p in partials]).groupby(level=0).sum()
+    invoices = pd.concat([p[1] for p in partials]).drop_duplicates()
+    counts = (
+        invoices.groupby(["YearMonth", "is_sale"]).size()
+        .unstack(fill_value=0)
+        .reindex(index=sums.index, columns=[True, False], fill_value=0)
+        .rename(columns={True: "orders", False: "credit_notes"})
     )
+    monthly = sums.join(counts).rename_axis("YearMonth").reset_index()
 
     monthly["net_sales"] = monthly["sales_gross"] - monthly["returns_gross"]
     monthly["net_cogs"] = monthly["cogs_sales"] - monthly["cogs_returns"]
@@ -107,8 +140,10 @@ def main(argv: list[str] | None = None) -> pd.DataFrame:
 
     if str(DEFAULT_INPUT) == args.inp:
         monthly = build_revenue_monthly()
+    elif Path(args.inp).suffix == ".parquet":
+        monthly = build_revenue_monthly(path=args.inp)
     else:
-        monthly = build_revenue_monthly(pd.read_csv(args.inp, parse_dates=["InvoiceDate"]))
+        monthly = build_revenue_monthly(read_csv(args.inp, parse_dates=["InvoiceDate"]))
 
     out_path = Path(args.out)
     write_parquet(monthly, out_path)
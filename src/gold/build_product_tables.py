@@ -9,68 +9,33 @@ from features.metrics import (
     calc_return_rate_value,
     calc_return_units,
     ensure_period,
+    pct_change_sorted,
+    round_inplace,
     safe_div,
+    sales_returns_summary,
 )
-from utils.data import load_transactions
-from utils.io import get_paths, logger, read_csv, write_parquet
-from utils.schemas import product_monthly_kpis_schema
+from utils import schemas
+from utils.data import load_dim_product, load_transactions
+from utils.io import get_paths, logger, write_parquet_many
 
 PATHS = get_paths()
 PRODUCT_MONTHLY_PATH = PATHS.gold / "product_monthly_kpis.parquet"
 PRODUCT_SNAPSHOT_PATH = PATHS.gold / "product_kpis.parquet"
 PRODUCT_ABC_PATH = PATHS.gold / "product_abc.parquet"
-DIM_PRODUCT_PATH = PATHS.silver / "dim_product.csv"
-
-
-def _load_dim_product() -> pd.DataFrame:
-    if not DIM_PRODUCT_PATH.exists():
-        return pd.DataFrame(columns=["StockCode", "description_mode"])
-    dim = read_csv(DIM_PRODUCT_PATH)
-    dim["StockCode"] = dim["StockCode"].astype(str).str.strip().str.upper()
-    return dim[["StockCode", "description_mode"]].drop_duplicates()
+ABC_LABELS = np.array(["A", "B", "C"], dtype=object)
 
 
 def build_product_monthly(tx: pd.DataFrame, dim: pd.DataFrame) -> pd.DataFrame:
-    sales = tx[~tx["IsReturn"]].copy()
-    returns = tx[tx["IsReturn"]].copy()
-
-    grouped_all = tx.groupby(["StockCode", "YearMonth"], dropna=False)
-    grouped_sales = sales.groupby(["StockCode", "YearMonth"], dropna=False)
-    grouped_returns = returns.groupby(["StockCode", "YearMonth"], dropna=False)
-
-    monthly = grouped_all.agg(
-        net_sales=("Sales", "sum"),
-        cogs_net=("COGS", "sum"),
-        gp_net=("GrossProfit", "sum"),
-    ).reset_index()
-
-    monthly = monthly.merge(
-        grouped_sales.agg(
-            units_sold=("Quantity", "sum"),
-            gmv=("Sales", "sum"),
-            orders=("InvoiceNo", "nunique"),
-            buyers=("CustomerID", lambda s: s.dropna().nunique()),
-        ).reset_index(),
-        on=["StockCode", "YearMonth"],
-        how="left",
-    )
-
-    returns_metrics = grouped_returns.agg(
-        return_units_abs=("Quantity", lambda q: np.abs(q.sum())),
-        returns_value=("Sales", lambda s: np.abs(s.sum())),
-    ).reset_index()
-
-    monthly = monthly.merge(
-        returns_metrics,
-        on=["StockCode", "YearMonth"],
-        how="left",
-    )
-    monthly[["return_units_abs", "returns_value"]] = monthly[
-        ["return_units_abs", "returns_value"]
-    ].fillna(0.0)
-
-    for col in ["units_sold", "gmv"]:
-        monthly[col] = monthly[col].fillna(0.0)
+    # Netos, ventas y devoluciones en una sola agrupación enmascarada
+    # (sin copias de los subconjuntos, merges ni lambdas por grupo)
+    monthly = sales_returns_summary(
+        tx,
+        ["StockCode", "YearMonth"],
+        distinct={"orders": "InvoiceNo", "buyers": "CustomerID"},
+    ).rename(columns={"items_sold": "units_sold"})
+
+    for col in ["units_sold", "gmv", "return_units_abs", "returns_value"]:
+        monthly[col] = monthly[col].astype(float)
     for col in ["orders", "buyers"]:
         monthly[col] = monthly[col].fillna(0).astype("Int64")
 
@@ -98,8 +63,7 @@ def build_product_monthly(tx: pd.DataFrame, dim: pd.DataFrame) -> pd.DataFrame:
     # Orden por SKU y periodo + MoM por SKU
     monthly = monthly.sort_values(
         ["StockCode", "period"]).reset_index(drop=True)
-    monthly["net_sales_mom"] = monthly.groupby("StockCode")["net_sales"].pct_change()
-    monthly["net_sales_mom"] = safe_div(monthly["net_sales_mom"], 1.0)
+    monthly["net_sales_mom"] = pct_change_sorted(monthly["net_sales"], monthly["StockCode"])
 
     cols = [
         "period",
@@ -123,64 +87,43 @@ def build_product_monthly(tx: pd.DataFrame, dim: pd.DataFrame) -> pd.DataFrame:
     ]
     monthly = monthly[cols]
 
-    monthly = product_monthly_kpis_schema.validate(monthly, lazy=True)
+    monthly = schemas.product_monthly_kpis_schema.validate(monthly, lazy=True)
 
-    money_cols = [
-        "gmv",
-        "returns_value",
-        "net_sales",
-        "cogs_net",
-        "gp_net",
-        "aov",
-    ]
-    monthly[money_cols] = monthly[money_cols].round(2)
+    money_cols = ["gmv", "returns_value", "net_sales", "cogs_net", "gp_net"]
+    round_inplace(monthly, money_cols + ["units_sold", "return_units_abs"], 2)
+    round_inplace(monthly, ["aov"], 2, fill_value=0.0)
     pct_cols = ["gross_margin_pct", "return_rate_units",
                 "return_rate_value", "net_sales_mom"]
-    monthly[pct_cols] = monthly[pct_cols].round(4).fillna(0.0)
-    monthly[["units_sold", "return_units_abs"]] = monthly[
-        ["units_sold", "return_units_abs"]
-    ].round(2)
-    monthly["aov"] = monthly["aov"].fillna(0.0)
+    round_inplace(monthly, pct_cols, 4, fill_value=0.0)
 
     return monthly
 
 
 def build_product_snapshot(tx: pd.DataFrame, monthly: pd.DataFrame, dim: pd.DataFrame) -> pd.DataFrame:
-    sales = tx[~tx["IsReturn"]].copy()
-    returns = tx[tx["IsReturn"]].copy()
-
-    base = tx.groupby("StockCode", dropna=False).agg(
-        net_sales=("Sales", "sum"),
-        cogs_net=("COGS", "sum"),
-        gp_net=("GrossProfit", "sum"),
-    ).reset_index()
-
-    sales_agg = sales.groupby("StockCode", dropna=False).agg(
-        units_sold=("Quantity", "sum"),
-        gmv=("Sales", "sum"),
-        orders=("InvoiceNo", "nunique"),
-        buyers=("CustomerID", lambda s: s.dropna().nunique()),
-    ).reset_index()
-
-    returns_agg = returns.groupby("StockCode", dropna=False).agg(
-        returns_value=("Sales", lambda s: np.abs(s.sum())),
-        return_units_abs=("Quantity", lambda q: np.abs(q.sum())),
-    ).reset_index()
-
-    snap = base.merge(sales_agg, on="StockCode", how="left")
-    snap = snap.merge(returns_agg, on="StockCode", how="left")
-
-    snap[["units_sold", "gmv", "orders", "buyers", "returns_value", "return_units_abs"]] = snap[
-        ["units_sold", "gmv", "orders", "buyers",
-            "returns_value", "return_units_abs"]
-    ].fillna(0)
-    snap["orders"] = snap["orders"].astype("Int64")
-    snap["buyers"] = snap["buyers"].astype("Int64")
+    # Misma agregación enmascarada que el mensual, por SKU (una sola pasada)
+    snap = sales_returns_summary(
+        tx,
+        "StockCode",
+        distinct={"orders": "InvoiceNo", "buyers": "CustomerID"},
+    ).rename(columns={"items_sold": "units_sold"})
 
-    first_last = monthly.groupby("StockCode").agg(
-        first_period=("YearMonth", "min"),
-        last_period=("YearMonth", "max"),
-    ).reset_index()
+    for col in ["units_sold", "gmv", "return_units_abs", "returns_value"]:
+        snap[col] = snap[col].astype(float)
+    for col in ["orders", "buyers"]:
+        snap[col] = snap[col].fillna(0).astype("Int64")
+
+    # monthly ya viene ordenado por (StockCode, period): primer y último mes de
+    # cada SKU son la primera y la última fila de su bloque (sin otro groupby)
+    keys = monthly[["StockCode", "YearMonth"]]
+    first = keys.drop_duplicates("StockCode", keep="first")
+    last = keys.drop_duplicates("StockCode", keep="last")
+    first_last = pd.DataFrame(
+        {
+            "StockCode": first["StockCode"].to_numpy(),
+            "first_period": first["YearMonth"].to_numpy(),
+            "last_period": last["YearMonth"].to_numpy(),
+        }
+    )
     snap = snap.merge(first_last, on="StockCode", how="left")
 
     if not dim.empty:
@@ -192,13 +135,9 @@ def build_product_snapshot(tx: pd.DataFrame, monthly: pd.DataFrame, dim: pd.Data
     snap["return_rate_value"] = safe_div(snap["returns_value"], snap["gmv"])
 
     money_cols = ["gmv", "returns_value", "net_sales", "cogs_net", "gp_net"]
-    snap[money_cols] = snap[money_cols].round(2)
-    snap[["units_sold", "return_units_abs"]] = snap[[
-        "units_sold", "return_units_abs"]].round(2)
-    snap[["gross_margin_pct", "return_rate_units", "return_rate_value"]] = (
-        snap[["gross_margin_pct", "return_rate_units", "return_rate_value"]]
-        .round(4)
-        .fillna(0.0)
+    round_inplace(snap, money_cols + ["units_sold", "return_units_abs"], 2)
+    round_inplace(
+        snap, ["gross_margin_pct", "return_rate_units", "return_rate_value"], 4, fill_value=0.0
     )
 
     cols = [
@@ -230,20 +169,18 @@ def build_product_abc(snapshot: pd.DataFrame) -> pd.DataFrame:
     total = float(df["net_sales"].clip(lower=0).sum()) or 1.0
     df["cum_share_net_sales"] = df["net_sales"].clip(lower=0).cumsum() / total
 
-    def label(percent: float) -> str:
-        if percent <= 0.80:
-            return "A"
-        if percent <= 0.95:
-            return "B"
-        return "C"
-
-    df["ABC"] = df["cum_share_net_sales"].map(label)
+    # Clase por comparación vectorizada (0=A hasta 80%, 1=B hasta 95%, 2=C);
+    # se niega ``<=`` para que un NaN caiga en C como antes
+    cum_share = df["cum_share_net_sales"].to_numpy()
+    codes = ~(cum_share <= 0.80)
+    codes = codes.view(np.uint8) + ~(cum_share <= 0.95)
+    df["ABC"] = ABC_LABELS[codes]
     return df[["StockCode", "ABC", "cum_share_net_sales"]]
 
 
 def build_product_tables() -> dict[str, pd.DataFrame]:
     tx = load_transactions()
-    dim = _load_dim_product()
+    dim = load_dim_product()
     monthly = build_product_monthly(tx, dim)
     snapshot = build_product_snapshot(tx, monthly, dim)
     abc = build_product_abc(snapshot)
@@ -256,9 +193,14 @@ def build_product_tables() -> dict[str, pd.DataFrame]:
 
 def main() -> dict[str, pd.DataFrame]:
     outputs = build_product_tables()
-    write_parquet(outputs["product_monthly_kpis"], PRODUCT_MONTHLY_PATH)
-    write_parquet(outputs["product_kpis"], PRODUCT_SNAPSHOT_PATH)
-    write_parquet(outputs["product_abc"], PRODUCT_ABC_PATH)
+    # Tablas terminales: escritura concurrente
+    write_parquet_many(
+        {
+            PRODUCT_MONTHLY_PATH: outputs["product_monthly_kpis"],
+            PRODUCT_SNAPSHOT_PATH: outputs["product_kpis"],
+            PRODUCT_ABC_PATH: outputs["product_abc"],
+        }
+    )
     logger.info(
         "product_monthly_kpis rows=%s | product_kpis rows=%s | product_abc rows=%s",
         len(outputs["product_monthly_kpis"]),
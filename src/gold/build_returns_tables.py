@@ -7,12 +7,18 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
-from features.metrics import calc_return_rate_value, calc_return_units, ensure_period, safe_div
-from utils.data import load_transactions
-from utils.io import get_paths, logger, read_csv, write_parquet
+from features.metrics import (
+    calc_return_rate_value,
+    calc_return_units,
+    ensure_period,
+    safe_div,
+    year_month_labels,
+)
+from utils.data import load_dim_product, load_transactions
+from utils.io import get_paths, logger, read_csv, read_parquet, write_parquet_many
 
 PATHS = get_paths()
-DEFAULT_INPUT = PATHS.silver / "transactions_base.csv"
+DEFAULT_INPUT = PATHS.silver / "transactions_base.parquet"
 GOLD_DIR = PATHS.gold
 
 
@@ -20,62 +26,108 @@ def load_tx(path: str | None = None) -> pd.DataFrame:
     if path is None or Path(path) == DEFAULT_INPUT:
         df = load_transactions()
     else:
-        df = read_csv(path, parse_dates=["InvoiceDate"])
+        if Path(path).suffix == ".parquet":
+            df = read_parquet(path)
+        else:
+            df = read_csv(path, parse_dates=["InvoiceDate"])
         if "IsReturn" not in df.columns:
             df["IsReturn"] = df["Quantity"] < 0
         if "YearMonth" not in df.columns:
-            df["YearMonth"] = pd.to_datetime(df["InvoiceDate"], errors="raise").dt.to_period("M").astype(str)
+            df["YearMonth"] = year_month_labels(pd.to_datetime(df["InvoiceDate"], errors="raise"))
     df["StockCode"] = df["StockCode"].astype("string").str.strip().str.upper()
     if "Description" in df.columns:
         df["Description"] = df["Description"].astype("string").str.strip()
     return df
 
 
-def kpis_returns(df: pd.DataFrame):
-    """Construye outputs GOLD de devoluciones."""
-    sales = df[~df["IsReturn"]].copy()
-    returns = df[df["IsReturn"]].copy()
-
-    returns["return_units_abs"] = np.abs(returns["Quantity"])
-    returns["returns_value"] = np.abs(returns["Sales"])
-    returns["returns_cogs"] = np.abs(returns["COGS"])
+# Lado venta / devolución que materializa Silver (transactions_base)
+SALES_RETURNS_COLUMNS = ["SalesGmv", "ReturnsValue", "ReturnsCogs", "ReturnUnitsAbs"]
+
+
+def _with_sales_returns_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Deriva las columnas de ``SALES_RETURNS_COLUMNS`` si la entrada no las trae."""
+    if set(SALES_RETURNS_COLUMNS).issubset(df.columns):
+        return df
+    is_ret = df["IsReturn"].astype(bool)
+    return df.assign(
+        SalesGmv=df["Sales"].where(~is_ret, 0.0),
+        ReturnsValue=df["Sales"].abs().where(is_ret, 0.0),
+        ReturnsCogs=df["COGS"].abs().where(is_ret, 0.0),
+        ReturnUnitsAbs=df["Quantity"].abs().where(is_ret, 0),
+    )
+
+
+def kpis_returns(df: pd.DataFrame, dim: pd.DataFrame | None = None):
+    """Construye outputs GOLD de devoluciones.
+
+    ``dim`` (StockCode, description_mode) aporta la descripción ya materializada en
+    Silver; sin él la moda se calcula sobre ``df``.
+    """
+    # SKU, país, factura y mes como category: los cuatro groupby y los nunique de
+    # facturas trabajan sobre códigos enteros. Columnas enmascaradas venta/devolución en el
+    # único frame nuevo: cada dimensión sale de un solo groupby con reductores
+    # nativos (sin groupby por mitad + join outer + fillna)
+    df = _with_sales_returns_columns(df)
+    key_dtypes = {col: df[col].dtype for col in ["StockCode", "Country", "InvoiceNo"]}
+    is_ret = df["IsReturn"].astype(bool)
+    is_sale = ~is_ret
+    df = df.assign(
+        **{col: df[col].astype("category") for col in key_dtypes},
+        YearMonth=df["YearMonth"].astype(str).astype("category"),
+    )
+    df = df.assign(
+        qty_sale=df["Quantity"].where(is_sale, 0),
+        inv_sale=df["InvoiceNo"].where(is_sale),
+        cust_sale=df["CustomerID"].where(is_sale),
+        return_date=df["InvoiceDate"].where(is_ret),
+        inv_ret=df["InvoiceNo"].where(is_ret),
+    )
+    returns = df[is_ret]
+    ret_aggs = {
+        "return_units_abs": ("ReturnUnitsAbs", "sum"),
+        "returns_value": ("ReturnsValue", "sum"),
+        "returns_cogs": ("ReturnsCogs", "sum"),
+    }
 
     inv = (
-        returns.groupby("InvoiceNo").agg(
+        returns.groupby("InvoiceNo", observed=True).agg(
             InvoiceDate=("InvoiceDate", "min"),
             CustomerID=("CustomerID", "first"),
             Country=("Country", "first"),
             items_distinct=("StockCode", "nunique"),
-            return_units_abs=("return_units_abs", "sum"),
-            returns_value=("returns_value", "sum"),
-            returns_cogs=("returns_cogs", "sum"),
+            **ret_aggs,
         ).reset_index()
     )
-    inv["period"] = (
-        pd.to_datetime(inv["InvoiceDate"], errors="coerce").dt.to_period("M").dt.to_timestamp()
-    )
-
-    denom_prod = sales.groupby("StockCode").agg(
-        units_sold=("Quantity", "sum"),
-        gmv=("Sales", "sum"),
-    )
-    ret_prod = returns.groupby("StockCode").agg(
-        return_units_abs=("return_units_abs", "sum"),
-        returns_value=("returns_value", "sum"),
-        returns_cogs=("returns_cogs", "sum"),
-        first_return=("InvoiceDate", "min"),
-        last_return=("InvoiceDate", "max"),
-    )
-    prod = denom_prod.join(ret_prod, how="outer").fillna(0).reset_index()
+    inv["Country"] = inv["Country"].astype(key_dtypes["Country"])
+    # string[python]: Arrow lo publica como string (string[pyarrow] saldría large_string)
+    inv["InvoiceNo"] = inv["InvoiceNo"].astype("string")
+    inv = ensure_period(inv, "InvoiceDate", "period")
+
+    prod = df.groupby("StockCode", observed=True).agg(
+        units_sold=("qty_sale", "sum"),
+        gmv=("SalesGmv", "sum"),
+        **ret_aggs,
+        first_return=("return_date", "min"),
+        last_return=("return_date", "max"),
+    ).reset_index()
     try:
-        desc_mode = (
-            df.groupby("StockCode")["Description"].agg(
-                lambda s: s.mode().iat[0] if not s.mode().empty else pd.NA
+        if dim is not None and not dim.empty:
+            desc_mode = dim.set_index("StockCode")["description_mode"].str.strip()
+        else:
+            # Moda por conteo de pares (SKU, descripción): sort estable por frecuencia
+            # y la primera fila de cada SKU (empates → descripción menor, como mode())
+            desc_mode = (
+                df.groupby(["StockCode", "Description"], observed=True)
+                .size()
+                .reset_index(name="n")
+                .sort_values("n", ascending=False, kind="stable")
+                .drop_duplicates("StockCode")
+                .set_index("StockCode")["Description"]
             )
-        )
         prod = prod.merge(desc_mode.rename("Description"), on="StockCode", how="left")
     except Exception:
         prod["Description"] = pd.NA
+    prod["StockCode"] = prod["StockCode"].astype(key_dtypes["StockCode"])
     prod = calc_return_units(
         prod,
         returns_units_col="return_units_abs",
@@ -87,19 +139,15 @@ def kpis_returns(df: pd.DataFrame):
         gmv_col="gmv",
     )
 
-    denom_ctry = sales.groupby("Country").agg(
-        units_sold=("Quantity", "sum"),
-        gmv=("Sales", "sum"),
-        orders=("InvoiceNo", "nunique"),
-        buyers=("CustomerID", lambda s: s.dropna().nunique()),
-    )
-    ret_ctry = returns.groupby("Country").agg(
-        return_units_abs=("return_units_abs", "sum"),
-        returns_value=("returns_value", "sum"),
-        returns_cogs=("returns_cogs", "sum"),
-        credit_notes=("InvoiceNo", "nunique"),
-    )
-    ctry = denom_ctry.join(ret_ctry, how="outer").fillna(0).reset_index()
+    ctry = df.groupby("Country", observed=True).agg(
+        units_sold=("qty_sale", "sum"),
+        gmv=("SalesGmv", "sum"),
+        orders=("inv_sale", "nunique"),
+        buyers=("cust_sale", "nunique"),
+        **ret_aggs,
+        credit_notes=("inv_ret", "nunique"),
+    ).reset_index()
+    ctry["Country"] = ctry["Country"].astype(key_dtypes["Country"])
     ctry = calc_return_units(
         ctry,
         returns_units_col="return_units_abs",
@@ -111,22 +159,14 @@ def kpis_returns(df: pd.DataFrame):
         gmv_col="gmv",
     )
 
-    sales["YearMonth"] = sales["YearMonth"].astype(str)
-    returns["YearMonth"] = returns["YearMonth"].astype(str)
-    denom_m = sales.groupby("YearMonth").agg(
-        units_sold=("Quantity", "sum"),
-        gmv=("Sales", "sum"),
-        orders=("InvoiceNo", "nunique"),
-    )
-    ret_m = returns.groupby("YearMonth").agg(
-        return_units_abs=("return_units_abs", "sum"),
-        returns_value=("returns_value", "sum"),
-        returns_cogs=("returns_cogs", "sum"),
-        credit_notes=("InvoiceNo", "nunique"),
-    )
-    monthly = (
-        denom_m.join(ret_m, how="outer").fillna(0).reset_index().rename(columns={"YearMonth": "YearMonth"})
-    )
+    monthly = df.groupby("YearMonth", observed=True).agg(
+        units_sold=("qty_sale", "sum"),
+        gmv=("SalesGmv", "sum"),
+        orders=("inv_sale", "nunique"),
+        **ret_aggs,
+        credit_notes=("inv_ret", "nunique"),
+    ).reset_index()
+    monthly["YearMonth"] = monthly["YearMonth"].astype(str)
     monthly = ensure_period(monthly, "YearMonth", "period")
     monthly = calc_return_units(
         monthly,
@@ -135,6 +175,12 @@ def kpis_returns(df: pd.DataFrame):
     )
     monthly = calc_return_rate_value(monthly)
 
+    # Unidades en int64: la suma de Quantity int32 (Silver) solo se amplía si desborda
+    inv["return_units_abs"] = inv["return_units_abs"].astype(np.int64)
+    unit_cols = ["units_sold", "return_units_abs"]
+    for df_out in (prod, ctry, monthly):
+        df_out[unit_cols] = df_out[unit_cols].astype(np.int64)
+
     money_cols = ["gmv", "returns_value", "returns_cogs"]
     for df_out in (prod, ctry, monthly):
         df_out[money_cols] = df_out[money_cols].round(2)
@@ -160,13 +206,20 @@ def main(argv: list[str] | None = None):
     args = parser.parse_args(argv)
 
     df = load_tx(args.inp)
-    inv, prod, ctry, monthly = kpis_returns(df)
+    # La dimensión Silver describe la base canónica; otras entradas calculan su moda
+    dim = load_dim_product() if Path(args.inp) == DEFAULT_INPUT else None
+    inv, prod, ctry, monthly = kpis_returns(df, dim)
 
     outdir = Path(args.outdir)
-    write_parquet(inv, outdir / "returns_invoices.parquet")
-    write_parquet(prod, outdir / "returns_by_product.parquet")
-    write_parquet(ctry, outdir / "returns_by_country.parquet")
-    write_parquet(monthly, outdir / "returns_monthly.parquet")
+    # Tablas terminales: escritura concurrente
+    write_parquet_many(
+        {
+            outdir / "returns_invoices.parquet": inv,
+            outdir / "returns_by_product.parquet": prod,
+            outdir / "returns_by_country.parquet": ctry,
+            outdir / "returns_monthly.parquet": monthly,
+        }
+    )
 
     logger.info(
         "returns_invoices rows=%s | returns_by_product rows=%s | returns_by_country rows=%s | returns_monthly rows=%s",
@@ -2,9 +2,22 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Callable, Iterable, List, Sequence
 
-from utils.io import logger
+from utils.io import get_paths, logger
+
+
+def _newest_mtime(path: Path) -> int | None:
+    """mtime (ns) of ``path``; for directories, of its newest file. None if missing."""
+    if path.is_dir():
+        return max(
+            (p.stat().st_mtime_ns for p in path.rglob("*") if p.is_file()),
+            default=path.stat().st_mtime_ns,
+        )
+    if path.exists():
+        return path.stat().st_mtime_ns
+    return None
 
 
 @dataclass
@@ -14,14 +27,46 @@ class Task:
     inputs: Sequence[str] | None = None
     outputs: Sequence[str] | None = None
     requires: Iterable["Task"] | None = None
+    incremental: bool = False
     _has_run: bool = field(default=False, init=False, repr=False)
 
+    def is_up_to_date(self) -> bool:
+        """Make-style check: every output exists and is newer than every input.
+
+        Paths are relative to the repo root. Tasks without outputs, or with a
+        missing input, are never up to date.
+        """
+        if not self.outputs:
+            return False
+        base = get_paths().base
+        newest_input = 0
+        for name in self.inputs or []:
+            mtime = _newest_mtime(base / name)
+            if mtime is None:
+                return False
+            newest_input = max(newest_input, mtime)
+        for name in self.outputs:
+            mtime = _newest_mtime(base / name)
+            if mtime is None or mtime <= newest_input:
+                return False
+        return True
+
+    def skip_if_fresh(self) -> bool:
+        """Mark the task as run (and return True) if its outputs are up to date."""
+        if self.incremental and self.is_up_to_date():
+            logger.info("Skipping task %s (outputs up to date)", self.name)
+            self._has_run = True
+            return True
+        return False
+
     def execute(self, force: bool = False) -> None:
         if self._has_run and not force:
             logger.debug("Skipping task %s (already completed)", self.name)
             return
         for dependency in self.requires or []:
             dependency.execute(force=force)
+        if not force and self.skip_if_fresh():
+            return
         logger.info("Running task: %s", self.name)
         self.run()
         self._has_run = True
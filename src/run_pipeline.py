@@ -3,7 +3,10 @@ from __future__ import annotations
 
 import argparse
 import importlib
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
 from typing import Callable, Dict, Iterable, List
 
@@ -11,6 +14,7 @@ import yaml
 
 from pipeline.task import Task
 from utils.io import get_paths, logger
+from utils.schemas import VALIDATE_MODES
 
 PATHS = get_paths()
 SRC_DIR = PATHS.base / "src"
@@ -18,24 +22,51 @@ if str(SRC_DIR) not in sys.path:
     sys.path.insert(0, str(SRC_DIR))
 
 CONFIG_PATH = PATHS.configs / "artifacts.yml"
+# Parser C (libyaml) si PyYAML fue compilado con él
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
-def _resolve_entrypoint(entrypoint: str) -> Callable[[], None]:
+def _check_entrypoint(entrypoint: str) -> None:
     if ":" not in entrypoint:
         raise ValueError(f"Entrypoint '{entrypoint}' must be 'module:function'")
+
+
+@lru_cache(maxsize=None)
+def _resolve_entrypoint(entrypoint: str) -> Callable[[], None]:
+    _check_entrypoint(entrypoint)
     module_name, func_name = entrypoint.split(":", maxsplit=1)
     module = importlib.import_module(module_name)
     func = getattr(module, func_name)
     return func
 
 
-def _load_config(path: Path) -> Dict[str, dict]:
-    with path.open("r", encoding="utf-8") as fh:
-        config = yaml.safe_load(fh) or {}
+def _call_entrypoint(entrypoint: str) -> object:
+    # El módulo se importa recién al ejecutar la tarea: correr un subconjunto
+    # de artefactos no carga los builders del resto
+    func = _resolve_entrypoint(entrypoint)
+    # Los entrypoints con CLI propio no deben leer los argumentos del runner
+    argv = sys.argv
+    sys.argv = argv[:1]
+    try:
+        return func()
+    finally:
+        sys.argv = argv
+
+
+@lru_cache(maxsize=None)
+def _parse_config(path: str, mtime_ns: int) -> Dict[str, dict]:
+    # mtime_ns forma parte de la clave: si el YAML cambia se vuelve a parsear
+    with open(path, "r", encoding="utf-8") as fh:
+        config = yaml.load(fh, Loader=_YAML_LOADER) or {}
     return config.get("artifacts", {})
 
 
-def _build_tasks(artifact_specs: Dict[str, dict]) -> Dict[str, Task]:
+def _load_config(path: Path) -> Dict[str, dict]:
+    """Artifact specs from ``path``, parsed once per process (treat as read-only)."""
+    return _parse_config(str(path), path.stat().st_mtime_ns)
+
+
+def _build_tasks(artifact_specs: Dict[str, dict], incremental: bool = False) -> Dict[str, Task]:
     # Map outputs to artifact name for dependency resolution
     output_map: Dict[str, str] = {}
     for name, spec in artifact_specs.items():
@@ -47,13 +78,14 @@ def _build_tasks(artifact_specs: Dict[str, dict]) -> Dict[str, Task]:
         entrypoint = spec.get("entrypoint")
         if not entrypoint:
             raise ValueError(f"Artifact '{name}' missing 'entrypoint'")
-        run_callable = _resolve_entrypoint(entrypoint)
+        _check_entrypoint(entrypoint)
         tasks[name] = Task(
             name=name,
-            run=run_callable,
+            run=partial(_call_entrypoint, entrypoint),
             inputs=spec.get("inputs", []),
             outputs=spec.get("outputs", []),
             requires=[],
+            incremental=incremental,
         )
 
     # Attach dependencies
@@ -67,20 +99,85 @@ def _build_tasks(artifact_specs: Dict[str, dict]) -> Dict[str, Task]:
     return tasks
 
 
-def run_pipeline(targets: Iterable[str] | None = None) -> None:
+def _task_levels(roots: Iterable[Task]) -> List[List[Task]]:
+    """Group ``roots`` and their pending dependencies by depth in the DAG.
+
+    Tasks in the same level only depend on earlier levels, so they can run
+    concurrently.
+    """
+    depth: Dict[str, int] = {}
+    pending: Dict[str, Task] = {}
+
+    def visit(task: Task) -> int:
+        if task.name not in depth:
+            deps = [visit(dep) for dep in task.requires or []]
+            depth[task.name] = max(deps, default=-1) + 1
+            pending[task.name] = task
+        return depth[task.name]
+
+    for task in roots:
+        visit(task)
+    levels: List[List[Task]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for name, task in pending.items():
+        if not task._has_run:
+            levels[depth[name]].append(task)
+    return [level for level in levels if level]
+
+
+def _run_entrypoint(func: Callable[[], object]) -> None:
+    # El resultado no se devuelve (evita serializar DataFrames entre procesos)
+    func()
+
+
+def _run_tasks_parallel(roots: Iterable[Task], workers: int) -> None:
+    """Run ``roots`` level by level, sibling tasks in a process pool.
+
+    Each worker process pays its own ``load_transactions`` read (the cache is
+    per process); worthwhile when the sibling tasks dominate that read.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for level in _task_levels(roots):
+            # La frescura se evalúa al llegar al nivel: los anteriores ya escribieron
+            submitted = []
+            for task in level:
+                if task.skip_if_fresh():
+                    continue
+                logger.info("Running task: %s", task.name)
+                submitted.append((task, pool.submit(_run_entrypoint, task.run)))
+            for task, future in submitted:
+                future.result()
+                task._has_run = True
+
+
+def run_pipeline(
+    targets: Iterable[str] | None = None,
+    workers: int = 1,
+    force: bool = False,
+    incremental: bool = False,
+) -> None:
+    """Build ``targets`` (default: all artifacts) and their dependencies.
+
+    With ``incremental``, tasks whose outputs are newer than their inputs are
+    skipped (code changes are not tracked); ``force`` always rebuilds.
+    """
     artifact_specs = _load_config(CONFIG_PATH)
     if not artifact_specs:
         raise FileNotFoundError(f"No artifacts defined in {CONFIG_PATH}")
 
-    tasks = _build_tasks(artifact_specs)
+    tasks = _build_tasks(artifact_specs, incremental=incremental and not force)
     if targets:
         for target in targets:
             if target not in tasks:
                 raise KeyError(f"Unknown artifact '{target}'")
-            tasks[target].execute()
+        roots = [tasks[target] for target in targets]
     else:
-        for name in artifact_specs.keys():
-            tasks[name].execute()
+        roots = [tasks[name] for name in artifact_specs.keys()]
+
+    if workers > 1:
+        _run_tasks_parallel(roots, workers)
+        return
+    for task in roots:
+        task.execute()
 
 
 def main(argv: List[str] | None = None) -> None:
@@ -90,10 +187,41 @@ def main(argv: List[str] | None = None) -> None:
         nargs="*",
         help="Specific artifacts to build (default: all).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for independent tasks (default: 1, sequential with a shared in-memory cache).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild every task, even with --incremental.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Skip tasks whose outputs are newer than their inputs "
+        "(only data is compared: use --force after changing code).",
+    )
+    parser.add_argument(
+        "--validate",
+        choices=VALIDATE_MODES,
+        help="Schema validation: strict (pandera), lax (required columns only) or none "
+        "(default: $RETAIL_VALIDATE or strict).",
+    )
     args = parser.parse_args(argv)
+    if args.validate:
+        # Por entorno: lo heredan también los procesos de --workers
+        os.environ["RETAIL_VALIDATE"] = args.validate
 
     logger.info("Starting pipeline (targets=%s)", args.artifacts or "ALL")
-    run_pipeline(args.artifacts or None)
+    run_pipeline(
+        args.artifacts or None,
+        workers=args.workers,
+        force=args.force,
+        incremental=args.incremental,
+    )
     logger.info("Pipeline finished")
 
 
@@ -2,22 +2,24 @@
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 
 BASE = Path(__file__).resolve().parents[2]
-BRONZE = BASE / "data/bronze/online_retail_enriched.csv"
-OUT = BASE / "data/silver/transactions_base.csv"
+BRONZE = BASE / "data/bronze/online_retail_enriched"
+OUT = BASE / "data/silver/transactions_base.parquet"
 
 
 def main():
     # Lee Bronze
-    df = pd.read_csv(BRONZE, parse_dates=["InvoiceDate"])
+    df = pd.read_parquet(BRONZE)
 
     # --- Normalización de claves/textos ---
     # Evita duplicados por casing/espacios en producto
     if "StockCode" in df.columns:
         df["StockCode"] = df["StockCode"].astype(str).str.strip().str.upper()
     if "Description" in df.columns:
-        df["Description"] = df["Description"].astype(str).str.strip()
+        # Como astype(str): una descripción ausente queda como el texto "nan"
+        df["Description"] = df["Description"].astype("string").str.strip().fillna("nan")
     if "CustomerID" in df.columns:
         # Mantener nulos reales; evitar "nan" como texto
         df["CustomerID"] = (
@@ -45,13 +47,32 @@ def main():
 
     trans = df.loc[keep].copy()
 
+    # Quantity a int32 si cabe (sin nulos tras el filtro; margen para abs()).
+    # Montos quedan en float64: float32 no representa centavos exactos.
+    i32 = np.iinfo(np.int32)
+    if trans["Quantity"].between(i32.min + 1, i32.max).all():
+        trans["Quantity"] = trans["Quantity"].astype(np.int32)
+
+    # Lado venta / devolución precalculado una vez para todos los consumidores
+    # (devoluciones en magnitud por fila): Silver y GOLD las suman directamente
+    is_return = trans["IsReturn"]
+    trans["SalesGmv"] = trans["Sales"].where(~is_return, 0.0)
+    trans["ReturnsValue"] = trans["Sales"].abs().where(is_return, 0.0)
+    trans["ReturnsCogs"] = trans["COGS"].abs().where(is_return, 0.0)
+    trans["ReturnUnitsAbs"] = trans["Quantity"].abs().where(is_return, 0)
+
     # Derivados de fecha
-    trans["YearMonth"] = trans["InvoiceDate"].dt.to_period("M").astype(str)
-    trans["Date"] = trans["InvoiceDate"].dt.date
+    # AAAA-MM por aritmética datetime64[M]; solo se formatean los meses distintos
+    month_codes, months = pd.factorize(
+        trans["InvoiceDate"].to_numpy().astype("datetime64[M]"), use_na_sentinel=False)
+    trans["YearMonth"] = months.astype(str).astype(object)[month_codes]
+    # Fecha (date32) desde datetime64[D]: sin un objeto ``date`` de Python por fila
+    trans["Date"] = pd.arrays.ArrowExtensionArray(
+        pa.array(trans["InvoiceDate"].to_numpy().astype("datetime64[D]")))
 
     # Export
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    trans.to_csv(OUT, index=False, date_format="%Y-%m-%d")
+    trans.to_parquet(OUT, index=False)
     print(
         f"[OK] {OUT} -> {len(trans):,} filas (removidas inválidas: {int(invalid_sales.sum())})")
 
@@ -0,0 +1,41 @@
+# src/silver/build_all.py
+# Construye todas las tablas Silver derivadas de transactions_base con una sola
+# lectura: cada builder recibe el mismo frame y solo escribe su salida.
+import pyarrow.parquet as pq
+
+from silver import (
+    build_country_monthly,
+    build_credit_notes_fact,
+    build_customer_monthly,
+    build_dim_customer,
+    build_dim_product,
+    build_invoices_fact,
+    build_product_monthly,
+)
+
+BUILDERS = (
+    build_country_monthly,
+    build_customer_monthly,
+    build_dim_customer,
+    build_dim_product,
+    build_invoices_fact,
+    build_credit_notes_fact,
+    build_product_monthly,
+)
+SRC = build_country_monthly.SRC
+
+
+def main():
+    if not SRC.exists():
+        raise FileNotFoundError(f"No encuentro {SRC}")
+    # Unión de las columnas que usan los builders (en orden, sin repetir)
+    available = pq.read_schema(SRC).names
+    columns = dict.fromkeys(c for b in BUILDERS for c in b.COLUMNS if c in available)
+    t = pq.read_table(SRC, columns=list(columns)).to_pandas()
+
+    for builder in BUILDERS:
+        builder.write(builder.build(t))
+
+
+if __name__ == "__main__":
+    main()
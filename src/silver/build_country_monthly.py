@@ -2,34 +2,47 @@
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 
 BASE = Path(__file__).resolve().parents[2]
-SRC = BASE / "data/silver/transactions_base.csv"
-OUT = BASE / "data/silver/country_monthly.csv"
+SRC = BASE / "data/silver/transactions_base.parquet"
+OUT = BASE / "data/silver/country_monthly.parquet"
+# Solo las columnas que usa este builder (el resto no se decodifica)
+COLUMNS = [
+    "InvoiceNo", "CustomerID", "Country", "YearMonth", "Quantity", "Sales",
+    "GrossProfit", "IsReturn", "SalesGmv", "ReturnsValue",
+]
 
 
-def main():
+def read() -> pd.DataFrame:
     if not SRC.exists():
         raise FileNotFoundError(f"No encuentro {SRC}")
-    t = pd.read_csv(SRC, parse_dates=["InvoiceDate"])
+    available = pq.read_schema(SRC).names
+    return pd.read_parquet(SRC, columns=[c for c in COLUMNS if c in available])
+
+
+def build(t: pd.DataFrame) -> pd.DataFrame:
+    # Copia superficial: las columnas auxiliares no tocan el frame compartido
+    t = t.copy(deep=False)
 
     if "IsReturn" not in t.columns:
         t["IsReturn"] = t["Quantity"] < 0
 
-    g = t.groupby(["Country", "YearMonth"], dropna=False)
+    # Columnas enmascaradas una sola vez (venta / devolución): el groupby usa
+    # solo reductores nativos, sin lambdas ni ``.loc`` por grupo
+    is_sale = ~t["IsReturn"].astype(bool)
+    t["InvSale"] = t["InvoiceNo"].where(is_sale)
+    t["CustSale"] = t["CustomerID"].where(is_sale)
+    t["QtySale"] = t["Quantity"].where(is_sale, 0)
 
-    cmtry = g.agg(
-        gmv=("Sales", lambda s: s[t.loc[s.index, "IsReturn"] == False].sum()),
-        returns_value=("Sales", lambda s: np.abs(
-            s[t.loc[s.index, "IsReturn"] == True]).sum()),
+    cmtry = t.groupby(["Country", "YearMonth"], dropna=False).agg(
+        gmv=("SalesGmv", "sum"),
+        returns_value=("ReturnsValue", "sum"),
         net_sales=("Sales", "sum"),
         gp_net=("GrossProfit", "sum"),
-        orders=("InvoiceNo",
-                lambda x: x[t.loc[x.index, "IsReturn"] == False].nunique()),
-        customers=(
-            "CustomerID", lambda c: c[t.loc[c.index, "IsReturn"] == False].nunique()),
-        items_sold=(
-            "Quantity", lambda q: q[t.loc[q.index, "IsReturn"] == False].sum()),
+        orders=("InvSale", "nunique"),
+        customers=("CustSale", "nunique"),
+        items_sold=("QtySale", "sum"),
     ).reset_index()
 
     cmtry["aov"] = np.where(cmtry["orders"] > 0,
@@ -37,15 +50,25 @@ def main():
     cmtry["gross_margin_pct"] = np.where(
         cmtry["net_sales"] != 0, cmtry["gp_net"] / cmtry["net_sales"], np.nan)
 
-    # Share mensual (penetración por país dentro del mes)
-    total_mes = cmtry.groupby("YearMonth")["net_sales"].transform("sum")
+    # Share mensual (penetración por país dentro del mes): total por mes agregado
+    # una vez (una fila por mes) y mapeado por clave, sin merge
+    totals = cmtry.groupby("YearMonth", sort=False)["net_sales"].sum()
+    total_mes = cmtry["YearMonth"].map(totals)
     cmtry["net_sales_share"] = np.where(
         total_mes > 0, cmtry["net_sales"] / total_mes, np.nan)
 
+    return cmtry
+
+
+def write(cmtry: pd.DataFrame) -> None:
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    cmtry.to_csv(OUT, index=False)
+    cmtry.to_parquet(OUT, index=False)
     print(f"[OK] {OUT} -> {len(cmtry):,} filas")
 
 
+def main():
+    write(build(read()))
+
+
 if __name__ == "__main__":
     main()
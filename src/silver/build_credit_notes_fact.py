@@ -1,18 +1,27 @@
 # src/silver/build_credit_notes_fact.py
 from pathlib import Path
 import pandas as pd
+import pyarrow.parquet as pq
 
 BASE = Path(__file__).resolve().parents[2]
-SRC = BASE / "data/silver/transactions_base.csv"
-OUT = BASE / "data/silver/credit_notes_fact.csv"
+SRC = BASE / "data/silver/transactions_base.parquet"
+OUT = BASE / "data/silver/credit_notes_fact.parquet"
+# Solo las columnas que usa este builder (el resto no se decodifica)
+COLUMNS = [
+    "InvoiceNo", "InvoiceDate", "CustomerID", "Country", "StockCode", "Quantity",
+    "Sales", "COGS", "GrossProfit", "IsReturn",
+]
 
 
-def main():
+def read() -> pd.DataFrame:
     if not SRC.exists():
         raise FileNotFoundError(f"No encuentro {SRC}")
-    df = pd.read_csv(SRC, parse_dates=["InvoiceDate"])
+    available = pq.read_schema(SRC).names
+    return pd.read_parquet(SRC, columns=[c for c in COLUMNS if c in available])
+
 
-    returns = df[df["IsReturn"]].copy()  # solo devoluciones
+def build(df: pd.DataFrame) -> pd.DataFrame:
+    returns = df[df["IsReturn"]]  # solo devoluciones (solo lectura: sin copia)
 
     cn = (returns.groupby("InvoiceNo").agg(
         InvoiceDate=("InvoiceDate", "min"),
@@ -25,12 +34,22 @@ def main():
         gross_profit_total=("GrossProfit", "sum")  # negativo
     ).reset_index())
 
-    cn["YearMonth"] = cn["InvoiceDate"].dt.to_period("M").astype(str)
+    # AAAA-MM por aritmética datetime64[M]; solo se formatean los meses distintos
+    month_codes, months = pd.factorize(
+        cn["InvoiceDate"].to_numpy().astype("datetime64[M]"), use_na_sentinel=False)
+    cn["YearMonth"] = months.astype(str).astype(object)[month_codes]
+    return cn
+
 
+def write(cn: pd.DataFrame) -> None:
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    cn.to_csv(OUT, index=False, date_format="%Y-%m-%d")
+    cn.to_parquet(OUT, index=False)
     print(f"[OK] {OUT} -> {len(cn):,} filas")
 
 
+def main():
+    write(build(read()))
+
+
 if __name__ == "__main__":
     main()
@@ -2,47 +2,78 @@
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 
 BASE = Path(__file__).resolve().parents[2]
-SRC = BASE / "data/silver/transactions_base.csv"
-OUT = BASE / "data/silver/customer_monthly.csv"
+SRC = BASE / "data/silver/transactions_base.parquet"
+OUT = BASE / "data/silver/customer_monthly.parquet"
+# Solo las columnas que usa este builder (el resto no se decodifica)
+COLUMNS = [
+    "InvoiceNo", "InvoiceDate", "CustomerID", "Country", "YearMonth", "Quantity",
+    "Sales", "COGS", "GrossProfit", "IsReturn", "SalesGmv", "ReturnsValue",
+]
 
 
-def main():
+def read() -> pd.DataFrame:
     if not SRC.exists():
         raise FileNotFoundError(f"No encuentro {SRC}")
-    t = pd.read_csv(SRC, parse_dates=["InvoiceDate"])
+    available = pq.read_schema(SRC).names
+    return pd.read_parquet(SRC, columns=[c for c in COLUMNS if c in available])
+
+
+def build(t: pd.DataFrame) -> pd.DataFrame:
+    # Copia superficial: las columnas auxiliares no tocan el frame compartido
+    t = t.copy(deep=False)
 
     # Flags por si no vienen
     if "IsReturn" not in t.columns:
         t["IsReturn"] = t["Quantity"] < 0
 
-    g = t.groupby(["CustomerID", "YearMonth"], dropna=False)
+    # Columnas enmascaradas una sola vez (venta / devolución): el groupby usa
+    # solo reductores nativos, sin lambdas ni ``.loc`` por grupo
+    is_sale = ~t["IsReturn"].astype(bool)
+    t["InvSale"] = t["InvoiceNo"].where(is_sale)
+    t["QtySale"] = t["Quantity"].where(is_sale, 0)
 
-    cm = g.agg(
-        gmv=("Sales", lambda s: s[t.loc[s.index, "IsReturn"] == False].sum()),
-        returns_value=("Sales", lambda s: np.abs(
-            s[t.loc[s.index, "IsReturn"] == True]).sum()),
+    keys = ["CustomerID", "YearMonth"]
+    cm = t.groupby(keys, dropna=False).agg(
+        gmv=("SalesGmv", "sum"),
+        returns_value=("ReturnsValue", "sum"),
         net_sales=("Sales", "sum"),
         cogs_net=("COGS", "sum"),
         gp_net=("GrossProfit", "sum"),
-        orders=("InvoiceNo",
-                lambda x: x[t.loc[x.index, "IsReturn"] == False].nunique()),
-        items_sold=(
-            "Quantity", lambda q: q[t.loc[q.index, "IsReturn"] == False].sum()),
+        orders=("InvSale", "nunique"),
+        items_sold=("QtySale", "sum"),
         last_purchase=("InvoiceDate", "max"),
-        country_mode=("Country", lambda c: c.mode(
-        ).iat[0] if not c.mode().empty else pd.NA),
     ).reset_index()
 
+    # País dominante: conteo por (cliente, mes, país), sort estable por frecuencia
+    # y primera fila por clave (empates → país menor, como mode())
+    modes = t.groupby(keys + ["Country"], dropna=False).size().reset_index(name="n")
+    modes = (
+        modes[modes["Country"].notna()]
+        .sort_values("n", ascending=False, kind="stable")
+        .drop_duplicates(keys)
+        .rename(columns={"Country": "country_mode"})
+    )
+    cm = cm.merge(modes[keys + ["country_mode"]], on=keys, how="left")
+
     cm["aov"] = np.where(cm["orders"] > 0, cm["net_sales"] / cm["orders"], 0.0)
     cm["gross_margin_pct"] = np.where(
         cm["net_sales"] != 0, cm["gp_net"] / cm["net_sales"], np.nan)
 
+    return cm
+
+
+def write(cm: pd.DataFrame) -> None:
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    cm.to_csv(OUT, index=False, date_format="%Y-%m-%d")
+    cm.to_parquet(OUT, index=False)
     print(f"[OK] {OUT} -> {len(cm):,} filas")
 
 
+def main():
+    write(build(read()))
+
+
 if __name__ == "__main__":
     main()
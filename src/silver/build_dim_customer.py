@@ -1,38 +1,60 @@
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 
 BASE = Path(__file__).resolve().parents[2]
-SRC = BASE / "data/silver/transactions_base.csv"
-OUT = BASE / "data/silver/dim_customer.csv"
+SRC = BASE / "data/silver/transactions_base.parquet"
+OUT = BASE / "data/silver/dim_customer.parquet"
+# Solo las columnas que usa este builder (el resto no se decodifica)
+COLUMNS = [
+    "InvoiceNo", "InvoiceDate", "CustomerID", "Country", "Quantity", "Sales",
+    "COGS", "GrossProfit", "IsReturn",
+]
 
 
-def main():
+def read() -> pd.DataFrame:
     if not SRC.exists():
         raise FileNotFoundError(f"No encuentro {SRC}")
-    t = pd.read_csv(SRC, parse_dates=["InvoiceDate"])
+    available = pq.read_schema(SRC).names
+    return pd.read_parquet(SRC, columns=[c for c in COLUMNS if c in available])
+
+
+def build(t: pd.DataFrame) -> pd.DataFrame:
+    # Copia superficial: las columnas auxiliares no tocan el frame compartido
+    t = t.copy(deep=False)
 
     # Flags
     t["IsReturn"] = t.get("IsReturn", (t["Quantity"] < 0))
 
-    # Métricas por cliente (solo ventas para órdenes; netos para $)
+    # Métricas por cliente (solo ventas para órdenes; netos para $).
+    # Facturas de venta enmascaradas una vez: nunique nativo, sin lambda por grupo
     is_sale = ~t["IsReturn"]
-    g = t.groupby("CustomerID", dropna=False)
+    t["InvSale"] = t["InvoiceNo"].where(is_sale)
+    # Sin ordenar grupos aquí: la dimensión se ordena una sola vez al final
+    g = t.groupby("CustomerID", dropna=False, sort=False, observed=True)
 
     dim = pd.DataFrame({
         "CustomerID": g.size().index
     })
     dim["first_purchase"] = g["InvoiceDate"].min().values
     dim["last_purchase"] = g["InvoiceDate"].max().values
-    dim["country_mode"] = g["Country"].agg(
-        lambda s: s.mode().iat[0] if not s.mode().empty else pd.NA).values
+    # País dominante: conteo por (cliente, país), sort estable por frecuencia
+    # y primera fila por cliente (empates → país menor, como mode())
+    modes = t.groupby(["CustomerID", "Country"], dropna=False).size().reset_index(name="n")
+    modes = (
+        modes[modes["Country"].notna()]
+        .sort_values("n", ascending=False, kind="stable")
+        .drop_duplicates("CustomerID")
+        .set_index("CustomerID")["Country"]
+    )
+    dim["country_mode"] = dim["CustomerID"].map(modes)
 
     # Totales netos
     net_sales = g["Sales"].sum()
     cogs_net = g["COGS"].sum()
     gp_net = g["GrossProfit"].sum()
-    orders_sale = g["InvoiceNo"].agg(
-        lambda x: x[is_sale.loc[x.index]].nunique())
+    orders_sale = g["InvSale"].nunique()
 
     dim["net_sales_total"] = dim["CustomerID"].map(net_sales).round(2)
     dim["cogs_total"] = dim["CustomerID"].map(cogs_net).round(2)
@@ -51,11 +73,19 @@ def main():
     max_date = t["InvoiceDate"].max()
     dim["recency_days"] = (max_date - dim["last_purchase"]).dt.days
 
-    dim = dim.sort_values("CustomerID")
+    dim = dim.sort_values("CustomerID", ignore_index=True)
+    return dim
+
+
+def write(dim: pd.DataFrame) -> None:
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    dim.to_csv(OUT, index=False, date_format="%Y-%m-%d")
+    dim.to_parquet(OUT, index=False)
     print(f"[OK] {OUT} -> {len(dim):,} filas")
 
 
+def main():
+    write(build(read()))
+
+
 if __name__ == "__main__":
     main()
@@ -1,37 +1,70 @@
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 
 BASE = Path(__file__).resolve().parents[2]
-SRC = BASE / "data/silver/transactions_base.csv"
-OUT = BASE / "data/silver/dim_product.csv"
+SRC = BASE / "data/silver/transactions_base.parquet"
+OUT = BASE / "data/silver/dim_product.parquet"
+# Solo las columnas que usa este builder (el resto no se decodifica)
+COLUMNS = [
+    "InvoiceNo", "InvoiceDate", "CustomerID", "StockCode", "Description",
+    "UnitPrice",
+]
 
 
-def main():
+def read() -> pd.DataFrame:
     if not SRC.exists():
         raise FileNotFoundError(f"No encuentro {SRC}")
-    t = pd.read_csv(SRC, parse_dates=["InvoiceDate"])
+    available = pq.read_schema(SRC).names
+    return pd.read_parquet(SRC, columns=[c for c in COLUMNS if c in available])
+
+
+def build(t: pd.DataFrame) -> pd.DataFrame:
+    # Copia superficial: las columnas auxiliares no tocan el frame compartido
+    t = t.copy(deep=False)
 
     # Precio unitario efectivo por fila (por si hay cambios con el tiempo)
     t["UnitPrice"] = t["UnitPrice"].astype(float)
 
-    g = t.groupby("StockCode", dropna=False)
+    # Sin ordenar grupos aquí: la dimensión se ordena una sola vez al final
+    g = t.groupby("StockCode", dropna=False, sort=False, observed=True)
     dim = g.agg(
-        description_mode=("Description", lambda s: s.mode(
-        ).iat[0] if not s.mode().empty else pd.NA),
         first_sold=("InvoiceDate", "min"),
         last_sold=("InvoiceDate", "max"),
         median_price=("UnitPrice", "median"),
         p95_price=("UnitPrice", lambda s: np.percentile(s, 95)),
-        buyer_count_total=("CustomerID", lambda s: s.dropna().nunique()),
+        buyer_count_total=("CustomerID", "nunique"),  # nunique ya ignora nulos
         orders_total=("InvoiceNo", "nunique")
     ).reset_index()
 
-    dim = dim.sort_values("StockCode")
+    # Descripción dominante, materializada aquí para que GOLD no la recalcule:
+    # conteo por (producto, descripción), sort estable por frecuencia y primera
+    # fila por producto (empates → descripción menor, como mode())
+    desc = t.groupby(["StockCode", "Description"], dropna=False).size().reset_index(name="n")
+    desc = (
+        desc[desc["Description"].notna()]
+        .sort_values("n", ascending=False, kind="stable")
+        .drop_duplicates("StockCode")
+        .rename(columns={"Description": "description_mode"})
+    )
+    dim = dim.merge(desc[["StockCode", "description_mode"]], on="StockCode", how="left")
+    cols = ["StockCode", "description_mode"]
+    dim = dim[cols + [c for c in dim.columns if c not in cols]]
+
+    dim = dim.sort_values("StockCode", ignore_index=True)
+    return dim
+
+
+def write(dim: pd.DataFrame) -> None:
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    dim.to_csv(OUT, index=False, date_format="%Y-%m-%d")
+    dim.to_parquet(OUT, index=False)
     print(f"[OK] {OUT} -> {len(dim):,} filas")
 
 
+def main():
+    write(build(read()))
+
+
 if __name__ == "__main__":
     main()
@@ -1,18 +1,27 @@
 # src/silver/build_invoices_fact.py
 from pathlib import Path
 import pandas as pd
+import pyarrow.parquet as pq
 
 BASE = Path(__file__).resolve().parents[2]
-SRC = BASE / "data/silver/transactions_base.csv"
-OUT = BASE / "data/silver/invoices_fact.csv"
+SRC = BASE / "data/silver/transactions_base.parquet"
+OUT = BASE / "data/silver/invoices_fact.parquet"
+# Solo las columnas que usa este builder (el resto no se decodifica)
+COLUMNS = [
+    "InvoiceNo", "InvoiceDate", "CustomerID", "Country", "StockCode", "Quantity",
+    "Sales", "COGS", "GrossProfit", "IsReturn",
+]
 
 
-def main():
+def read() -> pd.DataFrame:
     if not SRC.exists():
         raise FileNotFoundError(f"No encuentro {SRC}")
-    df = pd.read_csv(SRC, parse_dates=["InvoiceDate"])
+    available = pq.read_schema(SRC).names
+    return pd.read_parquet(SRC, columns=[c for c in COLUMNS if c in available])
+
 
-    sales = df[~df["IsReturn"]].copy()  # solo ventas
+def build(df: pd.DataFrame) -> pd.DataFrame:
+    sales = df[~df["IsReturn"]]  # solo ventas (solo lectura: sin copia)
 
     inv = (sales.groupby("InvoiceNo").agg(
         InvoiceDate=("InvoiceDate", "min"),
@@ -25,12 +34,22 @@ def main():
         gross_profit_total=("GrossProfit", "sum"),
     ).reset_index())
 
-    inv["YearMonth"] = inv["InvoiceDate"].dt.to_period("M").astype(str)
+    # AAAA-MM por aritmética datetime64[M]; solo se formatean los meses distintos
+    month_codes, months = pd.factorize(
+        inv["InvoiceDate"].to_numpy().astype("datetime64[M]"), use_na_sentinel=False)
+    inv["YearMonth"] = months.astype(str).astype(object)[month_codes]
+    return inv
+
 
+def write(inv: pd.DataFrame) -> None:
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    inv.to_csv(OUT, index=False, date_format="%Y-%m-%d")
+    inv.to_parquet(OUT, index=False)
     print(f"[OK] {OUT} -> {len(inv):,} filas")
 
 
+def main():
+    write(build(read()))
+
+
 if __name__ == "__main__":
     main()
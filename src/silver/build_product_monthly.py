@@ -2,47 +2,71 @@
 from pathlib import Path
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 
 BASE = Path(__file__).resolve().parents[2]
-SRC = BASE / "data/silver/transactions_base.csv"
-OUT = BASE / "data/silver/product_monthly.csv"
+SRC = BASE / "data/silver/transactions_base.parquet"
+OUT = BASE / "data/silver/product_monthly.parquet"
+# Solo las columnas que usa este builder (el resto no se decodifica)
+COLUMNS = [
+    "InvoiceNo", "CustomerID", "StockCode", "Description", "YearMonth", "Quantity",
+    "Sales", "COGS", "GrossProfit", "IsReturn", "SalesGmv",
+]
 
 
-def main():
+def read() -> pd.DataFrame:
     if not SRC.exists():
         raise FileNotFoundError(f"No encuentro {SRC}")
-    t = pd.read_csv(SRC, parse_dates=["InvoiceDate"])
+    available = pq.read_schema(SRC).names
+    return pd.read_parquet(SRC, columns=[c for c in COLUMNS if c in available])
+
+
+def build(t: pd.DataFrame) -> pd.DataFrame:
+    # Copia superficial: las columnas auxiliares no tocan el frame compartido
+    t = t.copy(deep=False)
 
     if "IsReturn" not in t.columns:
         t["IsReturn"] = t["Quantity"] < 0
 
-    # Solo para ventas / devoluciones según flag
-    is_sale = ~t["IsReturn"]
-    is_ret = t["IsReturn"]
+    # Columnas enmascaradas una sola vez (venta / devolución): el groupby usa
+    # solo reductores nativos, sin lambdas ni ``.loc`` por grupo
+    is_sale = ~t["IsReturn"].astype(bool)
+    t["QtySale"] = t["Quantity"].where(is_sale, 0)
+    t["QtyRet"] = t["Quantity"].where(~is_sale, 0)
+    t["SalesRet"] = t["Sales"].where(~is_sale, 0.0)
+    t["InvSale"] = t["InvoiceNo"].where(is_sale)
+    t["CustSale"] = t["CustomerID"].where(is_sale)
 
     # Métricas por producto y mes
-    g = t.groupby(["StockCode", "YearMonth"], dropna=False)
-
-    pm = g.agg(
+    keys = ["StockCode", "YearMonth"]
+    # Sin ordenar grupos aquí: la salida se ordena una sola vez al final
+    pm = t.groupby(keys, dropna=False, sort=False, observed=True).agg(
         # ventas
-        units_sold=("Quantity", lambda q: q[is_sale.loc[q.index]].sum()),
-        gmv=("Sales", lambda s: s[is_sale.loc[s.index]].sum()),
-        # devoluciones (magnitud)
-        return_units_abs=("Quantity", lambda q: np.abs(
-            q[is_ret.loc[q.index]].sum())),
-        returns_value=("Sales", lambda s: np.abs(
-            s[is_ret.loc[s.index]].sum())),
+        units_sold=("QtySale", "sum"),
+        gmv=("SalesGmv", "sum"),
+        # devoluciones (magnitud del total)
+        return_units_abs=("QtyRet", "sum"),
+        returns_value=("SalesRet", "sum"),
         # netos
         net_sales=("Sales", "sum"),
         cogs_net=("COGS",  "sum"),
         gp_net=("GrossProfit", "sum"),
         # demanda
-        orders=("InvoiceNo", lambda x: x[is_sale.loc[x.index]].nunique()),
-        buyers=("CustomerID", lambda c: c[is_sale.loc[c.index]].nunique()),
-        # descripción dominante (para rotular)
-        description_mode=("Description", lambda d: d.mode(
-        ).iat[0] if not d.mode().empty else pd.NA),
+        orders=("InvSale", "nunique"),
+        buyers=("CustSale", "nunique"),
     ).reset_index()
+    pm[["return_units_abs", "returns_value"]] = pm[["return_units_abs", "returns_value"]].abs()
+
+    # Descripción dominante (para rotular): conteo por (producto, mes, descripción),
+    # sort estable por frecuencia y primera fila por clave (empates → menor, como mode())
+    desc = t.groupby(keys + ["Description"], dropna=False).size().reset_index(name="n")
+    desc = (
+        desc[desc["Description"].notna()]
+        .sort_values("n", ascending=False, kind="stable")
+        .drop_duplicates(keys)
+        .rename(columns={"Description": "description_mode"})
+    )
+    pm = pm.merge(desc[keys + ["description_mode"]], on=keys, how="left")
 
     # Ratios útiles
     pm["return_rate_units"] = np.where((pm["units_sold"] > 0),
@@ -56,12 +80,20 @@ def main():
     pm[money] = pm[money].round(2)
     pm["gross_margin_pct"] = pm["gross_margin_pct"].round(4)
     pm["return_rate_units"] = pm["return_rate_units"].round(4)
-    pm = pm.sort_values(["StockCode", "YearMonth"])
+    pm = pm.sort_values(["StockCode", "YearMonth"], ignore_index=True)
 
+    return pm
+
+
+def write(pm: pd.DataFrame) -> None:
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    pm.to_csv(OUT, index=False)
+    pm.to_parquet(OUT, index=False)
     print(f"[OK] {OUT} -> {len(pm):,} filas")
 
 
+def main():
+    write(build(read()))
+
+
 if __name__ == "__main__":
     main()
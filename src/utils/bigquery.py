@@ -0,0 +1,183 @@
+"""BigQuery load helpers shared by the GOLD upload/export scripts."""
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable
+
+from utils.io import get_paths, logger
+
+DEFAULT_WORKERS = 8
+DEFAULT_STAGING_PREFIX = "retail_gold"
+
+
+@lru_cache(maxsize=1)
+def load_bigquery():
+    """Módulo ``google.cloud.bigquery`` (import diferido: ``--help`` no lo carga)."""
+    try:
+        from google.cloud import bigquery  # type: ignore
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError(
+            "google-cloud-bigquery debe estar instalado para ejecutar este script."
+        ) from exc
+    return bigquery
+
+
+@lru_cache(maxsize=None)
+def _load_schema(table: str) -> tuple | None:
+    """Esquema explícito ``configs/schemas/<tabla>.json`` (formato bq) o None."""
+    path = get_paths().configs / "schemas" / f"{table}.json"
+    if not path.exists():
+        return None
+    bigquery = load_bigquery()
+    with path.open("r", encoding="utf-8") as fh:
+        fields = json.load(fh)
+    return tuple(
+        bigquery.SchemaField(f["name"], f["type"], mode=f.get("mode", "NULLABLE"))
+        for f in fields
+    )
+
+
+def gold_job_configs() -> Callable[[str], object]:
+    """``tabla -> LoadJobConfig`` para cargas GOLD (Parquet, WRITE_TRUNCATE).
+
+    Las tablas sin esquema explícito comparten una única config; solo las que
+    tienen ``configs/schemas/<tabla>.json`` reciben la suya.
+    """
+    bigquery = load_bigquery()
+    load_options = {
+        "source_format": bigquery.SourceFormat.PARQUET,
+        "write_disposition": bigquery.WriteDisposition.WRITE_TRUNCATE,
+    }
+    base_config = bigquery.LoadJobConfig(**load_options)
+
+    def job_config(table: str):
+        schema = _load_schema(table)
+        if schema is None:
+            return base_config
+        return bigquery.LoadJobConfig(schema=list(schema), **load_options)
+
+    return job_config
+
+
+def stage_to_gcs(
+    gold_dir: Path,
+    parquets: list[Path],
+    bucket_name: str,
+    prefix: str,
+    project: str | None = None,
+    max_workers: int = DEFAULT_WORKERS,
+) -> dict[str, str]:
+    """Sube los Parquet a GCS en paralelo y devuelve ``{stem: gs://uri}``."""
+    try:
+        from google.cloud import storage  # type: ignore
+        from google.cloud.storage import transfer_manager  # type: ignore
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError(
+            "google-cloud-storage debe estar instalado para usar --staging-bucket."
+        ) from exc
+
+    bucket = storage.Client(project=project).bucket(bucket_name)
+    blob_prefix = f"{prefix.strip('/')}/" if prefix else ""
+    logger.info("Staging %s archivos en gs://%s/%s", len(parquets), bucket_name, blob_prefix)
+    transfer_manager.upload_many_from_filenames(
+        bucket,
+        [parquet.name for parquet in parquets],
+        source_directory=str(gold_dir),
+        blob_name_prefix=blob_prefix,
+        max_workers=max_workers,
+        raise_exception=True,
+    )
+    return {
+        parquet.stem: f"gs://{bucket_name}/{blob_prefix}{parquet.name}"
+        for parquet in parquets
+    }
+
+
+def _load_file(client, parquet: Path, table_id: str, job_config, location: str | None):
+    with parquet.open("rb") as handle:
+        load_job = client.load_table_from_file(
+            handle,
+            table_id,
+            location=location,
+            job_config=job_config,
+        )
+    load_job.result()
+    return load_job
+
+
+def load_gold_parquets(
+    client,
+    gold_dir: Path,
+    dataset: str,
+    job_config: Callable[[str], object] | None = None,
+    *,
+    project: str | None = None,
+    location: str | None = None,
+    max_workers: int = DEFAULT_WORKERS,
+    staging_bucket: str | None = None,
+    staging_prefix: str = DEFAULT_STAGING_PREFIX,
+) -> None:
+    """Carga cada ``gold_dir/*.parquet`` en ``dataset.<stem>``.
+
+    ``job_config(stem)`` da la configuración de cada tabla (por defecto
+    :func:`gold_job_configs`). Con ``staging_bucket``
+    los archivos pasan por GCS y BigQuery los carga server-side; si no, se suben
+    desde este proceso en paralelo.
+    """
+    if not gold_dir.exists():
+        raise FileNotFoundError(f"No existe el directorio GOLD: {gold_dir}")
+    parquets = sorted(gold_dir.glob("*.parquet"))
+    if job_config is None:
+        job_config = gold_job_configs()
+
+    if staging_bucket:
+        # Carga server-side desde GCS: sin pasar los bytes por este proceso
+        uris = stage_to_gcs(
+            gold_dir,
+            parquets,
+            staging_bucket,
+            staging_prefix,
+            project=project,
+            max_workers=max_workers,
+        )
+        uri_jobs = {}
+        for parquet in parquets:
+            table_id = f"{dataset}.{parquet.stem}"
+            logger.info("Cargando %s → %s", uris[parquet.stem], table_id)
+            uri_jobs[table_id] = client.load_table_from_uri(
+                uris[parquet.stem],
+                table_id,
+                location=location,
+                job_config=job_config(parquet.stem),
+            )
+        for table_id, load_job in uri_jobs.items():
+            load_job.result()
+            logger.info("%s filas cargadas en %s", load_job.output_rows, table_id)
+        return
+
+    # Las cargas son independientes: se lanzan en paralelo y se esperan al final
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        jobs = {}
+        for parquet in parquets:
+            table_id = f"{dataset}.{parquet.stem}"
+            logger.info("Subiendo %s → %s", parquet.name, table_id)
+            future = pool.submit(
+                _load_file, client, parquet, table_id, job_config(parquet.stem), location
+            )
+            jobs[future] = table_id
+        for future in as_completed(jobs):
+            load_job = future.result()
+            logger.info("%s filas cargadas en %s", load_job.output_rows, jobs[future])
+
+
+__all__ = [
+    "DEFAULT_STAGING_PREFIX",
+    "DEFAULT_WORKERS",
+    "gold_job_configs",
+    "load_bigquery",
+    "load_gold_parquets",
+    "stage_to_gcs",
+]
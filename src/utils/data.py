@@ -1,22 +1,60 @@
 """Data loading helpers."""
 from __future__ import annotations
 
+from functools import lru_cache
+
 import pandas as pd
 
-from utils.io import get_paths, read_csv
-from utils.schemas import transactions_base_schema
+from utils import schemas
+from utils.io import get_paths, read_parquet
 
 
-def load_transactions() -> pd.DataFrame:
-    """Load and validate the canonical transactions base table."""
-    paths = get_paths()
-    path = paths.silver / "transactions_base.csv"
-    df = read_csv(path, parse_dates=["InvoiceDate"])
-    df = transactions_base_schema.validate(df, lazy=True)
+@lru_cache(maxsize=1)
+def _load_transactions(path: str, mtime_ns: int) -> pd.DataFrame:
+    # mtime_ns forma parte de la clave: si Silver se regenera se vuelve a leer
+    df = read_parquet(path)
+    df = schemas.transactions_base_schema.validate(df, lazy=True)
     df["Country"] = df["Country"].fillna("Unspecified").str.strip()
     df.loc[df["Country"] == "", "Country"] = "Unspecified"
     df["YearMonth"] = df["YearMonth"].astype(str)
+    # Claves de texto como strings Arrow (buffer UTF-8 contiguo, sin PyObject por fila)
+    for col in ["InvoiceNo", "StockCode", "Description"]:
+        if col in df.columns and df[col].dtype != "string[pyarrow]":
+            df[col] = df[col].astype("string[pyarrow]")
     return df
 
 
-__all__ = ["load_transactions"]
+@lru_cache(maxsize=1)
+def _load_dim_product(path: str, mtime_ns: int) -> pd.DataFrame:
+    # Solo las dos columnas que consumen los builders GOLD
+    dim = read_parquet(path, columns=["StockCode", "description_mode"])
+    dim["StockCode"] = dim["StockCode"].astype(str).str.strip().str.upper()
+    return dim.drop_duplicates()
+
+
+def load_transactions() -> pd.DataFrame:
+    """Load and validate the canonical transactions base table.
+
+    The parsed and validated frame is cached per process (all GOLD builders of a
+    pipeline run share one read). Each call returns a shallow copy: adding or
+    replacing columns is private to the caller, but the column buffers are
+    shared, so values must not be modified in place.
+    """
+    paths = get_paths()
+    path = paths.silver / "transactions_base.parquet"
+    return _load_transactions(str(path), path.stat().st_mtime_ns).copy(deep=False)
+
+
+def load_dim_product() -> pd.DataFrame:
+    """Load ``StockCode`` → ``description_mode`` from the silver product dimension.
+
+    The description mode is materialized once by the silver builder; GOLD tables
+    reuse it instead of recomputing it. Empty frame if the dimension is missing.
+    """
+    path = get_paths().silver / "dim_product.parquet"
+    if not path.exists():
+        return pd.DataFrame(columns=["StockCode", "description_mode"])
+    return _load_dim_product(str(path), path.stat().st_mtime_ns).copy()
+
+
+__all__ = ["load_transactions", "load_dim_product"]
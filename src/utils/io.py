@@ -3,15 +3,28 @@ from __future__ import annotations
 
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from pathlib import Path
 from types import SimpleNamespace
-from typing import Any
+from typing import Any, Mapping
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 LOGGER_NAME = "retail_analytics"
 _LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s - %(message)s"
+# Defaults de escritura Parquet: zstd (mejor ratio y decode que snappy),
+# row groups de ~128k filas para no fragmentar los scans posteriores y
+# páginas de 1 MB; claves repetidas (CustomerID, YearMonth...) van con diccionario
+PARQUET_WRITE_OPTIONS: dict[str, Any] = {
+    "compression": "zstd",
+    "compression_level": 3,
+    "row_group_size": 128_000,
+    "use_dictionary": True,
+    "data_page_size": 1 << 20,
+}
 
 
 def _configure_logger() -> logging.Logger:
@@ -65,16 +78,55 @@ def read_csv(path: str | Path, **kwargs: Any) -> pd.DataFrame:
     return df
 
 
+def read_parquet(path: str | Path, **kwargs: Any) -> pd.DataFrame:
+    """Read a parquet file (pyarrow) with logging."""
+    path_obj = Path(path)
+    logger.info("Reading Parquet: %s", path_obj)
+    df = pd.read_parquet(path_obj, engine="pyarrow", **kwargs)
+    logger.debug("Loaded %s shape=%s", path_obj.name, df.shape)
+    return df
+
+
 def write_parquet(df: pd.DataFrame, path: str | Path, *, coerce_dtypes: bool = True, **kwargs: Any) -> Path:
     """Write a DataFrame to parquet (pyarrow) with logging."""
     path_obj = Path(path)
     ensure_dir(path_obj)
     logger.info("Writing Parquet: %s rows=%s cols=%s", path_obj, len(df), len(df.columns))
     if coerce_dtypes:
-        df = df.copy()
-        df = df.convert_dtypes()
-    df.to_parquet(path_obj, index=False, engine="pyarrow", **kwargs)
+        df = df.convert_dtypes()  # devuelve un frame nuevo; no hace falta copiar antes
+    # Directo a Arrow: los Categorical salen como columnas diccionario nativas
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_table(table, path_obj, **{**PARQUET_WRITE_OPTIONS, **kwargs})
     return path_obj
 
 
-__all__ = ["get_paths", "ensure_dir", "read_csv", "write_parquet", "logger"]
+def write_parquet_many(outputs: Mapping[str | Path, pd.DataFrame], **kwargs: Any) -> list[Path]:
+    """Write several DataFrames concurrently (compression releases the GIL)."""
+    if len(outputs) <= 1:
+        return [write_parquet(df, path, **kwargs) for path, df in outputs.items()]
+    with ThreadPoolExecutor(max_workers=len(outputs)) as pool:
+        futures = [pool.submit(write_parquet, df, path, **kwargs) for path, df in outputs.items()]
+        return [future.result() for future in futures]
+
+
+@lru_cache(maxsize=256)
+def _parquet_metadata(path: str, mtime_ns: int) -> pq.FileMetaData:
+    return pq.read_metadata(path)
+
+
+def parquet_metadata(path: str | Path) -> pq.FileMetaData:
+    """Return parquet footer metadata, parsed once per (path, mtime)."""
+    path_obj = Path(path).resolve()
+    return _parquet_metadata(str(path_obj), path_obj.stat().st_mtime_ns)
+
+
+__all__ = [
+    "get_paths",
+    "ensure_dir",
+    "read_csv",
+    "read_parquet",
+    "write_parquet",
+    "write_parquet_many",
+    "parquet_metadata",
+    "logger",
+]
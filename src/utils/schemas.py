@@ -1,170 +1,262 @@
-"""DataFrame contracts for retail analytics artifacts."""
+"""DataFrame contracts for retail analytics artifacts.
+
+Los esquemas se construyen al primer acceso (PEP 562) y se reutilizan: importar
+el módulo no importa pandera ni arma ``Column``/``Check``.
+"""
 from __future__ import annotations
 
-try:
-    import pandera as pa  # type: ignore
-    from pandera import Column, DataFrameSchema, Check  # type: ignore
-except ImportError:  # pragma: no cover - fallback for environments without pandera
-    class _FallbackCheck:
-        @staticmethod
-        def ge(_min):
-            return None
-
-    class Column:  # type: ignore
-        def __init__(
-            self,
-            *_args,
-            required: bool = True,
-            **_kwargs,
-        ) -> None:
-            self.required = required
-
-    class DataFrameSchema:  # type: ignore
-        def __init__(self, columns, **_kwargs) -> None:
-            self.columns = columns
-
-        def validate(self, df, lazy: bool | None = None):
-            missing = [
-                name
-                for name, col in self.columns.items()
-                if getattr(col, "required", True) and name not in df.columns
-            ]
-            if missing:
-                raise KeyError(f"Missing columns: {missing}")
-            return df
-
-    class _FallbackPandera:
-        String = object()
-        Float = object()
-        Int64 = object()
-        DateTime = object()
-        Bool = object()
-
-    pa = _FallbackPandera()  # type: ignore
-    Check = _FallbackCheck()  # type: ignore
+import os
+from functools import lru_cache
+
+
+class _FallbackCheck:
+    @staticmethod
+    def ge(_min):
+        # Comparación vectorizada sobre la columna completa (nulos se ignoran)
+        def check(series) -> bool:
+            return not series.lt(_min).any()
+
+        check.__name__ = f"greater_than_or_equal_to({_min})"
+        return check
+
+
+class _FallbackColumn:
+    def __init__(
+        self,
+        _dtype=None,
+        *checks,
+        required: bool = True,
+        **_kwargs,
+    ) -> None:
+        self.required = required
+        self.checks = tuple(c for c in checks if callable(c))
+
+
+class _FallbackDataFrameSchema:
+    def __init__(self, columns, **_kwargs) -> None:
+        self.columns = columns
+        # Obligatorias resueltas una vez; validate solo compara nombres
+        self.required_columns = tuple(
+            name for name, col in columns.items() if getattr(col, "required", True)
+        )
+        self.column_checks = tuple(
+            (name, col.checks) for name, col in columns.items() if getattr(col, "checks", ())
+        )
+
+    def validate(self, df, lazy: bool | None = None):
+        present = set(df.columns)
+        missing = [name for name in self.required_columns if name not in present]
+        if missing:
+            raise KeyError(f"Missing columns: {missing}")
+        failed = [
+            f"{name}: {check.__name__}"
+            for name, checks in self.column_checks
+            if name in present
+            for check in checks
+            if not check(df[name])
+        ]
+        if failed:
+            raise ValueError(f"Failed checks: {failed}")
+        return df
+
+
+class _FallbackPandera:
+    String = object()
+    Float = object()
+    Int64 = object()
+    DateTime = object()
+    Bool = object()
+
+
+class _PassthroughDataFrameSchema(_FallbackDataFrameSchema):
+    def validate(self, df, lazy: bool | None = None):
+        return df
+
+
+VALIDATE_MODES = ("strict", "lax", "none")
+
+
+@lru_cache(maxsize=None)
+def _pandera():
+    """(pa, Column, DataFrameSchema, Check) según ``RETAIL_VALIDATE``.
+
+    ``strict`` (por defecto) usa pandera si está instalado; ``lax`` fuerza el
+    fallback liviano (columnas requeridas y ``Check.ge``) sin importar pandera;
+    ``none`` devuelve los frames sin validar.
+    """
+    mode = os.getenv("RETAIL_VALIDATE", "strict").strip().lower()
+    if mode not in VALIDATE_MODES:
+        raise ValueError(f"RETAIL_VALIDATE inválido: {mode!r} (opciones: {VALIDATE_MODES})")
+    if mode == "none":
+        return _FallbackPandera(), _FallbackColumn, _PassthroughDataFrameSchema, _FallbackCheck()
+    try:
+        if mode == "lax":
+            raise ImportError("pandera omitido por RETAIL_VALIDATE=lax")
+        import pandera as pa  # type: ignore
+        from pandera import Column, DataFrameSchema, Check  # type: ignore
+    except ImportError:  # pragma: no cover - fallback for environments without pandera
+        return _FallbackPandera(), _FallbackColumn, _FallbackDataFrameSchema, _FallbackCheck()
+    return pa, Column, DataFrameSchema, Check
+
 
 # ---------------------------------------------------------------------------
 # SILVER
 # ---------------------------------------------------------------------------
 
-transactions_base_schema = DataFrameSchema(
-    {
-        "InvoiceNo": Column(pa.String, required=True),
-        "StockCode": Column(pa.String, required=True),
-        "Description": Column(pa.String, required=False, coerce=True, nullable=True),
-        "Quantity": Column(pa.Float, required=True),
-        "InvoiceDate": Column(pa.DateTime, required=True),
-        "UnitPrice": Column(pa.Float, required=True),
-        "UnitCost": Column(pa.Float, required=True),
-        "CustomerID": Column(pa.String, required=False, nullable=True),
-        "Country": Column(pa.String, required=False, nullable=True),
-        "Sales": Column(pa.Float, required=True),
-        "COGS": Column(pa.Float, required=True),
-        "GrossProfit": Column(pa.Float, required=True),
-        "IsReturn": Column(pa.Bool, required=True),
-        "YearMonth": Column(pa.String, required=True),
-    },
-    coerce=True,
-    strict=False,
-)
+
+@lru_cache(maxsize=None)
+def _transactions_base_schema():
+    pa, Column, DataFrameSchema, Check = _pandera()
+    return DataFrameSchema(
+        {
+            "InvoiceNo": Column(pa.String, required=True),
+            "StockCode": Column(pa.String, required=True),
+            "Description": Column(pa.String, required=False, coerce=True, nullable=True),
+            "Quantity": Column(pa.Float, required=True),
+            "InvoiceDate": Column(pa.DateTime, required=True),
+            "UnitPrice": Column(pa.Float, required=True),
+            "UnitCost": Column(pa.Float, required=True),
+            "CustomerID": Column(pa.String, required=False, nullable=True),
+            "Country": Column(pa.String, required=False, nullable=True),
+            "Sales": Column(pa.Float, required=True),
+            "COGS": Column(pa.Float, required=True),
+            "GrossProfit": Column(pa.Float, required=True),
+            "IsReturn": Column(pa.Bool, required=True),
+            "YearMonth": Column(pa.String, required=True),
+            "SalesGmv": Column(pa.Float, required=False),
+            "ReturnsValue": Column(pa.Float, required=False),
+            "ReturnsCogs": Column(pa.Float, required=False),
+            "ReturnUnitsAbs": Column(pa.Float, required=False),
+        },
+        coerce=True,
+        strict=False,
+    )
+
 
 # ---------------------------------------------------------------------------
 # GOLD MONTHLY KPI TABLES
 # ---------------------------------------------------------------------------
 
-company_monthly_kpis_schema = DataFrameSchema(
-    {
-        "period": Column(pa.DateTime, required=True),
-        "YearMonth": Column(pa.String, required=True),
-        "orders": Column(pa.Int64, Check.ge(0), required=True),
-        "customers": Column(pa.Int64, Check.ge(0), required=True),
-        "items_sold": Column(pa.Float, required=True),
-        "gmv": Column(pa.Float, required=True),
-        "returns_value": Column(pa.Float, required=True),
-        "net_sales": Column(pa.Float, required=True),
-        "cogs_net": Column(pa.Float, required=True),
-        "gp_net": Column(pa.Float, required=True),
-        "gross_margin_pct": Column(pa.Float, required=True, nullable=True),
-        "net_sales_mom": Column(pa.Float, required=True, nullable=True),
-        "aov": Column(pa.Float, required=True, nullable=True),
-    },
-    coerce=True,
-    strict=False,
-)
-
-country_monthly_kpis_schema = DataFrameSchema(
-    {
-        "period": Column(pa.DateTime, required=True),
-        "YearMonth": Column(pa.String, required=True),
-        "Country": Column(pa.String, required=True),
-        "orders": Column(pa.Int64, Check.ge(0), required=True),
-        "customers": Column(pa.Int64, Check.ge(0), required=True),
-        "items_sold": Column(pa.Float, required=True),
-        "gmv": Column(pa.Float, required=True),
-        "returns_value": Column(pa.Float, required=True),
-        "net_sales": Column(pa.Float, required=True),
-        "cogs_net": Column(pa.Float, required=True),
-        "gp_net": Column(pa.Float, required=True),
-        "gross_margin_pct": Column(pa.Float, required=True, nullable=True),
-        "net_sales_share": Column(pa.Float, required=True, nullable=True),
-        "net_sales_mom": Column(pa.Float, required=True, nullable=True),
-        "aov": Column(pa.Float, required=True, nullable=True),
-        "return_units_abs": Column(pa.Float, required=True),
-        "return_rate_units": Column(pa.Float, required=True, nullable=True),
-        "return_rate_value": Column(pa.Float, required=True, nullable=True),
-    },
-    coerce=True,
-    strict=False,
-)
-
-product_monthly_kpis_schema = DataFrameSchema(
-    {
-        "period": Column(pa.DateTime, required=True),
-        "YearMonth": Column(pa.String, required=True),
-        "StockCode": Column(pa.String, required=True),
-        "description_mode": Column(pa.String, required=False, nullable=True),
-        "units_sold": Column(pa.Float, required=True),
-        "gmv": Column(pa.Float, required=True),
-        "returns_value": Column(pa.Float, required=True),
-        "net_sales": Column(pa.Float, required=True),
-        "cogs_net": Column(pa.Float, required=True),
-        "gp_net": Column(pa.Float, required=True),
-        "orders": Column(pa.Int64, Check.ge(0), required=True),
-        "buyers": Column(pa.Int64, Check.ge(0), required=True),
-        "aov": Column(pa.Float, required=True, nullable=True),
-        "return_units_abs": Column(pa.Float, required=True),
-        "return_rate_units": Column(pa.Float, required=True, nullable=True),
-        "return_rate_value": Column(pa.Float, required=True, nullable=True),
-    },
-    coerce=True,
-    strict=False,
-)
-
-customer_monthly_kpis_schema = DataFrameSchema(
-    {
-        "period": Column(pa.DateTime, required=True),
-        "YearMonth": Column(pa.String, required=True),
-        "customer_id": Column(pa.String, required=True),
-        "orders": Column(pa.Int64, Check.ge(0), required=True),
-        "items_sold": Column(pa.Float, required=True),
-        "gmv": Column(pa.Float, required=True),
-        "returns_value": Column(pa.Float, required=True),
-        "net_sales": Column(pa.Float, required=True),
-        "cogs_net": Column(pa.Float, required=True),
-        "gp_net": Column(pa.Float, required=True),
-        "aov": Column(pa.Float, required=True, nullable=True),
-        "gross_margin_pct": Column(pa.Float, required=True, nullable=True),
-        "net_sales_mom": Column(pa.Float, required=True, nullable=True),
-    },
-    coerce=True,
-    strict=False,
-)
-
-
-__all__ = [
-    "transactions_base_schema",
-    "company_monthly_kpis_schema",
-    "country_monthly_kpis_schema",
-    "product_monthly_kpis_schema",
-    "customer_monthly_kpis_schema",
-]
+
+@lru_cache(maxsize=None)
+def _company_monthly_kpis_schema():
+    pa, Column, DataFrameSchema, Check = _pandera()
+    return DataFrameSchema(
+        {
+            "period": Column(pa.DateTime, required=True),
+            "YearMonth": Column(pa.String, required=True),
+            "orders": Column(pa.Int64, Check.ge(0), required=True),
+            "customers": Column(pa.Int64, Check.ge(0), required=True),
+            "items_sold": Column(pa.Float, required=True),
+            "gmv": Column(pa.Float, required=True),
+            "returns_value": Column(pa.Float, required=True),
+            "net_sales": Column(pa.Float, required=True),
+            "cogs_net": Column(pa.Float, required=True),
+            "gp_net": Column(pa.Float, required=True),
+            "gross_margin_pct": Column(pa.Float, required=True, nullable=True),
+            "net_sales_mom": Column(pa.Float, required=True, nullable=True),
+            "aov": Column(pa.Float, required=True, nullable=True),
+        },
+        coerce=True,
+        strict=False,
+    )
+
+
+@lru_cache(maxsize=None)
+def _country_monthly_kpis_schema():
+    pa, Column, DataFrameSchema, Check = _pandera()
+    return DataFrameSchema(
+        {
+            "period": Column(pa.DateTime, required=True),
+            "YearMonth": Column(pa.String, required=True),
+            "Country": Column(pa.String, required=True),
+            "orders": Column(pa.Int64, Check.ge(0), required=True),
+            "customers": Column(pa.Int64, Check.ge(0), required=True),
+            "items_sold": Column(pa.Float, required=True),
+            "gmv": Column(pa.Float, required=True),
+            "returns_value": Column(pa.Float, required=True),
+            "net_sales": Column(pa.Float, required=True),
+            "cogs_net": Column(pa.Float, required=True),
+            "gp_net": Column(pa.Float, required=True),
+            "gross_margin_pct": Column(pa.Float, required=True, nullable=True),
+            "net_sales_share": Column(pa.Float, required=True, nullable=True),
+            "net_sales_mom": Column(pa.Float, required=True, nullable=True),
+            "aov": Column(pa.Float, required=True, nullable=True),
+            "return_units_abs": Column(pa.Float, required=True),
+            "return_rate_units": Column(pa.Float, required=True, nullable=True),
+            "return_rate_value": Column(pa.Float, required=True, nullable=True),
+        },
+        coerce=True,
+        strict=False,
+    )
+
+
+@lru_cache(maxsize=None)
+def _product_monthly_kpis_schema():
+    pa, Column, DataFrameSchema, Check = _pandera()
+    return DataFrameSchema(
+        {
+            "period": Column(pa.DateTime, required=True),
+            "YearMonth": Column(pa.String, required=True),
+            "StockCode": Column(pa.String, required=True),
+            "description_mode": Column(pa.String, required=False, nullable=True),
+            "units_sold": Column(pa.Float, required=True),
+            "gmv": Column(pa.Float, required=True),
+            "returns_value": Column(pa.Float, required=True),
+            "net_sales": Column(pa.Float, required=True),
+            "cogs_net": Column(pa.Float, required=True),
+            "gp_net": Column(pa.Float, required=True),
+            "orders": Column(pa.Int64, Check.ge(0), required=True),
+            "buyers": Column(pa.Int64, Check.ge(0), required=True),
+            "aov": Column(pa.Float, required=True, nullable=True),
+            "return_units_abs": Column(pa.Float, required=True),
+            "return_rate_units": Column(pa.Float, required=True, nullable=True),
+            "return_rate_value": Column(pa.Float, required=True, nullable=True),
+        },
+        coerce=True,
+        strict=False,
+    )
+
+
+@lru_cache(maxsize=None)
+def _customer_monthly_kpis_schema():
+    pa, Column, DataFrameSchema, Check = _pandera()
+    return DataFrameSchema(
+        {
+            "period": Column(pa.DateTime, required=True),
+            "YearMonth": Column(pa.String, required=True),
+            "customer_id": Column(pa.String, required=True),
+            "orders": Column(pa.Int64, Check.ge(0), required=True),
+            "items_sold": Column(pa.Float, required=True),
+            "gmv": Column(pa.Float, required=True),
+            "returns_value": Column(pa.Float, required=True),
+            "net_sales": Column(pa.Float, required=True),
+            "cogs_net": Column(pa.Float, required=True),
+            "gp_net": Column(pa.Float, required=True),
+            "aov": Column(pa.Float, required=True, nullable=True),
+            "gross_margin_pct": Column(pa.Float, required=True, nullable=True),
+            "net_sales_mom": Column(pa.Float, required=True, nullable=True),
+        },
+        coerce=True,
+        strict=False,
+    )
+
+
+_SCHEMAS = {
+    "transactions_base_schema": _transactions_base_schema,
+    "company_monthly_kpis_schema": _company_monthly_kpis_schema,
+    "country_monthly_kpis_schema": _country_monthly_kpis_schema,
+    "product_monthly_kpis_schema": _product_monthly_kpis_schema,
+    "customer_monthly_kpis_schema": _customer_monthly_kpis_schema,
+}
+
+
+def __getattr__(name: str):
+    try:
+        factory = _SCHEMAS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    return factory()
+
+
+__all__ = list(_SCHEMAS)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pandas as pd
+
+from gold.build_customer_tables import monthly_retention_table, rfm_scores
+
+SCORE_COLS = ["R_score", "F_score", "M_score", "RFM_score"]
+
+
+class RfmScoresTest(unittest.TestCase):
+    def test_fewer_customers_than_bins(self):
+        snap = pd.DataFrame(
+            {"recency_days": [10.0, 50.0], "frequency": [1.0, 1.0], "monetary": [5.0, 20.0]}
+        )
+        out = rfm_scores(snap)
+        self.assertEqual(out["R_score"].tolist(), [5, 1])
+        # Todos empatados: un solo bin, score 1
+        self.assertEqual(out["F_score"].tolist(), [1, 1])
+        self.assertEqual(out["M_score"].tolist(), [1, 5])
+        self.assertEqual(out["RFM_score"].tolist(), [511, 115])
+        self.assertEqual(out["segment"].astype(str).tolist(), ["Potential Loyalist", "At Risk"])
+
+    def test_ties_at_bin_edges_match_qcut(self):
+        snap = pd.DataFrame(
+            {
+                "recency_days": [5.0, 5, 5, 20, 20, 40, 60, 60, 90, 200],
+                "frequency": [1.0, 1, 1, 1, 1, 2, 2, 3, 4, 5],
+                "monetary": [10.0, 10, 10, 10, 50, 50, 80, 120, 120, 500],
+            }
+        )
+        out = rfm_scores(snap)
+        self.assertEqual(out["R_score"].tolist(), [4, 4, 4, 3, 3, 3, 2, 2, 1, 1])
+        self.assertEqual(out["F_score"].tolist(), [1, 1, 1, 1, 1, 1, 1, 2, 3, 3])
+        self.assertEqual(out["M_score"].tolist(), [1, 1, 1, 1, 2, 2, 3, 3, 3, 4])
+        # Mismos bins que pd.qcut (bordes repetidos descartados, scores desde 1)
+        for col, values in [
+            ("R_score", -snap["recency_days"]),
+            ("F_score", snap["frequency"]),
+            ("M_score", snap["monetary"]),
+        ]:
+            expected = pd.qcut(values, 5, labels=False, duplicates="drop") + 1
+            self.assertEqual(out[col].tolist(), expected.tolist(), col)
+
+    def test_scores_are_published_as_int64(self):
+        snap = pd.DataFrame(
+            {"recency_days": [1.0, 2, 3], "frequency": [1.0, 2, 3], "monetary": [1.0, 2, 3]}
+        )
+        out = rfm_scores(snap)
+        for col in SCORE_COLS:
+            self.assertEqual(out[col].dtype, np.int64, col)
+
+
+class MonthlyRetentionTest(unittest.TestCase):
+    def test_new_retained_reactivated_churned(self):
+        # C1 vuelve en abril tras un mes sin compras; C2 deja de comprar en marzo;
+        # las filas sin cliente (incluido mayo, solo con nulos) no cuentan
+        monthly = pd.DataFrame(
+            {
+                "CustomerID": pd.array(
+                    ["C1", "C1", "C1", "C2", "C2", "C3", "C3", None, None, None],
+                    dtype="string",
+                ),
+                "YearMonth": [
+                    "2021-01", "2021-02", "2021-04", "2021-01", "2021-02",
+                    "2021-02", "2021-03", "2021-01", "2021-03", "2021-05",
+                ],
+            }
+        )
+        out = monthly_retention_table(monthly)
+        self.assertEqual(
+            out["period"].tolist(),
+            list(pd.to_datetime(["2021-01-01", "2021-02-01", "2021-03-01", "2021-04-01"])),
+        )
+        self.assertEqual(out["active_customers"].tolist(), [2, 3, 1, 1])
+        self.assertEqual(out["new_customers"].tolist(), [2, 1, 0, 0])
+        self.assertEqual(out["retained"].tolist(), [0, 2, 1, 0])
+        self.assertEqual(out["reactivated"].tolist(), [0, 0, 0, 1])
+        self.assertEqual(out["churned"].tolist(), [0, 0, 2, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+from bronze.enrich_bronze import main
+
+HEADER = "InvoiceNo,StockCode,Description,Quantity,InvoiceDate,UnitPrice,CustomerID,Country,MarginPct,UnitCost\n"
+
+
+class EnrichBronzeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def _run(self, rows: list[str]) -> pd.DataFrame:
+        inp = self.dir / "raw.csv"
+        inp.write_text(HEADER + "".join(rows), encoding="utf-8")
+        out = self.dir / "enriched"
+        main(inp, out)
+        table = ds.dataset(out, partitioning="hive").to_table()
+        return table.to_pandas().sort_values("InvoiceNo", ignore_index=True)
+
+    def test_bad_cells_become_null(self):
+        # Como pd.to_numeric/to_datetime(errors="coerce"): la celda inválida queda nula
+        out = self._run(
+            [
+                "1,A,Alpha,abc,2011-01-05 10:00:00,2.0,12345.0,UK,0.5,1.0\n",
+                "2,A,Alpha,3,not a date,2.0,12345.0,UK,0.5,1.0\n",
+                "3,B,Beta,2,12/01/2010 08:26, 4.0 ,,FR,0.25,x\n",
+            ]
+        )
+        self.assertTrue(pd.isna(out["Quantity"].iat[0]))
+        self.assertTrue(pd.isna(out["Sales"].iat[0]))
+        self.assertTrue(pd.isna(out["InvoiceDate"].iat[1]))
+        self.assertEqual(out["YearMonth"].iat[1], "NaT")
+        self.assertEqual(out["Quantity"].iat[2], 2)
+        self.assertEqual(out["UnitPrice"].iat[2], 4.0)
+        self.assertTrue(pd.isna(out["UnitCost"].iat[2]))
+        self.assertEqual(out["InvoiceDate"].iat[2], pd.Timestamp("2010-12-01"))
+        self.assertEqual(out["YearMonth"].iat[2], "2010-12")
+
+    def test_clean_input_keeps_types(self):
+        out = self._run(["1,A,Alpha,-2,2011-01-05 10:00:00,2.0,12345.0,UK,0.5,1.0\n"])
+        self.assertEqual(out["Quantity"].dtype, "int64")
+        self.assertTrue(out["IsReturn"].iat[0])
+        self.assertEqual(out["Sales"].iat[0], -4.0)
+
+    def test_out_dir_only_replaces_month_partitions(self):
+        # --out apuntando a un directorio con otros archivos (incluida la entrada)
+        inp = self.dir / "raw.csv"
+        inp.write_text(HEADER + "1,A,Alpha,2,2011-01-05 10:00:00,2.0,12345.0,UK,0.5,1.0\n")
+        notes = self.dir / "notes.txt"
+        notes.write_text("keep")
+        stale = self.dir / "YearMonth=1999-01"
+        stale.mkdir()
+        (stale / "part-0.parquet").write_bytes(b"")
+        main(inp, self.dir)
+        main(inp, self.dir)
+        self.assertTrue(inp.exists())
+        self.assertEqual(notes.read_text(), "keep")
+        self.assertFalse(stale.exists())
+        self.assertEqual(
+            [p.name for p in (self.dir / "YearMonth=2011-01").iterdir()], ["part-0.parquet"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
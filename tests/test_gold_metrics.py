@@ -1,109 +1,67 @@
 from __future__ import annotations
 
 import unittest
-from datetime import datetime
 from pathlib import Path
 import sys
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
 
+import numpy as np
 import pandas as pd
 
 from gold.build_country_tables import build_country_monthly, build_country_snapshot
 from gold.build_product_tables import build_product_monthly, build_product_snapshot
+from gold.build_returns_tables import kpis_returns
 from gold.build_customer_monthly import build_customer_monthly
 from unittest.mock import patch
 
 
 def _sample_transactions() -> pd.DataFrame:
-    rows = [
+    # Una lista por columna (sin inferencia de tipos fila por fila)
+    df = pd.DataFrame(
         {
-            "InvoiceNo": "100",
-            "StockCode": "A",
-            "Description": "Alpha",
-            "Quantity": 5,
-            "InvoiceDate": datetime(2021, 1, 5),
-            "UnitPrice": 20.0,
-            "UnitCost": 12.0,
-            "CustomerID": "C1",
-            "Country": "UK",
-        },
-        {
-            "InvoiceNo": "101",
-            "StockCode": "A",
-            "Description": "Alpha",
-            "Quantity": -2,
-            "InvoiceDate": datetime(2021, 2, 2),
-            "UnitPrice": 20.0,
-            "UnitCost": 12.0,
-            "CustomerID": "C1",
-            "Country": "UK",
-        },
-        {
-            "InvoiceNo": "102",
-            "StockCode": "A",
-            "Description": "Alpha",
-            "Quantity": 2,
-            "InvoiceDate": datetime(2021, 2, 10),
-            "UnitPrice": 20.0,
-            "UnitCost": 12.0,
-            "CustomerID": "C1",
-            "Country": "UK",
-        },
-        {
-            "InvoiceNo": "103",
-            "StockCode": "B",
-            "Description": "Beta",
-            "Quantity": 3,
-            "InvoiceDate": datetime(2021, 2, 11),
-            "UnitPrice": 30.0,
-            "UnitCost": 15.0,
-            "CustomerID": "C3",
-            "Country": "UK",
-        },
-        {
-            "InvoiceNo": "104",
-            "StockCode": "B",
-            "Description": "Beta",
-            "Quantity": 1,
-            "InvoiceDate": datetime(2021, 1, 15),
-            "UnitPrice": 30.0,
-            "UnitCost": 15.0,
-            "CustomerID": "C2",
-            "Country": "France",
-        },
-        {
-            "InvoiceNo": "105",
-            "StockCode": "C",
-            "Description": "Gamma",
-            "Quantity": 4,
-            "InvoiceDate": datetime(2021, 1, 20),
-            "UnitPrice": 25.0,
-            "UnitCost": 10.0,
-            "CustomerID": None,
-            "Country": None,
-        },
-    ]
-    df = pd.DataFrame(rows)
-    df["Sales"] = df["Quantity"] * df["UnitPrice"]
-    df["COGS"] = df["Quantity"] * df["UnitCost"]
-    df["GrossProfit"] = df["Sales"] - df["COGS"]
-    df["IsReturn"] = df["Quantity"] < 0
-    df["YearMonth"] = df["InvoiceDate"].dt.to_period("M").astype(str)
+            "InvoiceNo": ["100", "101", "102", "103", "104", "105"],
+            "StockCode": ["A", "A", "A", "B", "B", "C"],
+            "Description": ["Alpha", "Alpha", "Alpha", "Beta", "Beta", "Gamma"],
+            "Quantity": np.array([5, -2, 2, 3, 1, 4], dtype=np.int64),
+            "InvoiceDate": np.array(
+                ["2021-01-05", "2021-02-02", "2021-02-10", "2021-02-11", "2021-01-15", "2021-01-20"],
+                dtype="datetime64[ns]",
+            ),
+            "UnitPrice": [20.0, 20.0, 20.0, 30.0, 30.0, 25.0],
+            "UnitCost": [12.0, 12.0, 12.0, 15.0, 15.0, 10.0],
+            "CustomerID": ["C1", "C1", "C1", "C3", "C2", None],
+            "Country": ["UK", "UK", "UK", "UK", "France", None],
+        }
+    )
+    # Derivados como en Silver, sobre los arrays NumPy
+    q, price, cost = (df[c].to_numpy() for c in ("Quantity", "UnitPrice", "UnitCost"))
+    sales, cogs = q * price, q * cost
+    df["Sales"] = sales
+    df["COGS"] = cogs
+    df["GrossProfit"] = sales - cogs
+    df["IsReturn"] = q < 0
+    df["YearMonth"] = df["InvoiceDate"].to_numpy().astype("datetime64[M]").astype(str).astype(object)
     return df
 
 
 class GoldMetricsTest(unittest.TestCase):
-    def setUp(self) -> None:
-        self.tx = _sample_transactions()
-        self.tx["Country"] = self.tx["Country"].fillna("Unspecified")
-        self.dim = pd.DataFrame(
+    @classmethod
+    def setUpClass(cls) -> None:
+        # Fixtures construidos una vez; cada test recibe copias superficiales
+        cls._tx = _sample_transactions()
+        cls._tx["Country"] = cls._tx["Country"].fillna("Unspecified")
+        cls._dim = pd.DataFrame(
             {
                 "StockCode": ["A", "B", "C"],
                 "description_mode": ["Alpha", "Beta", "Gamma"],
             }
         )
 
+    def setUp(self) -> None:
+        self.tx = self._tx.copy(deep=False)
+        self.dim = self._dim.copy(deep=False)
+
     def test_country_snapshot_buyers_distinct(self):
         monthly = build_country_monthly(self.tx)
         snapshot = build_country_snapshot(self.tx, monthly)
@@ -126,6 +84,16 @@ class GoldMetricsTest(unittest.TestCase):
         # Only customer C1 purchased product A
         self.assertEqual(buyers_a, 1)
 
+    def test_returns_unit_columns_are_int64(self):
+        # Silver guarda Quantity en int32; las unidades publicadas siguen en int64
+        tx = self.tx.assign(Quantity=self.tx["Quantity"].astype(np.int32))
+        inv, prod, ctry, monthly = kpis_returns(tx, self.dim)
+        self.assertEqual(inv["return_units_abs"].dtype, np.int64)
+        for out in (prod, ctry, monthly):
+            self.assertEqual(out["units_sold"].dtype, np.int64)
+            self.assertEqual(out["return_units_abs"].dtype, np.int64)
+        self.assertEqual(monthly["return_units_abs"].tolist(), [0, 2])
+
     @patch("gold.build_customer_monthly.load_transactions")
     def test_customer_monthly_excludes_returns_from_orders(self, mock_load):
         mock_load.return_value = self.tx.copy()
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import numpy as np
+import pandas as pd
+
+from features.metrics import (
+    group_nunique,
+    pct_change_sorted,
+    round_inplace,
+    sales_returns_summary,
+    year_month_labels,
+)
+from gold.build_country_tables import build_country_monthly
+
+
+def _summary_transactions() -> pd.DataFrame:
+    # UK con ventas y una devolución; FR solo devoluciones; una fila sin país ni cliente
+    return pd.DataFrame(
+        {
+            "Country": ["UK", "UK", "UK", "FR", None, "UK"],
+            "YearMonth": ["2021-02", "2021-02", "2021-02", "2021-01", "2021-01", "2021-01"],
+            "InvoiceNo": ["1", "2", "3", "4", "5", "6"],
+            "CustomerID": ["C1", "C2", "C1", "C3", None, "C1"],
+            "Quantity": [2, 3, -1, -2, 4, 1],
+            "Sales": [20.0, 30.0, -10.0, -40.0, 100.0, 10.0],
+            "COGS": [12.0, 15.0, -6.0, -20.0, 40.0, 6.0],
+            "GrossProfit": [8.0, 15.0, -4.0, -20.0, 60.0, 4.0],
+            "IsReturn": [False, False, True, True, False, False],
+        }
+    )
+
+
+class SalesReturnsSummaryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tx = _summary_transactions()
+
+    def _summary(self, **kwargs) -> pd.DataFrame:
+        return sales_returns_summary(
+            self.tx, "Country", distinct={"orders": "InvoiceNo", "customers": "CustomerID"}, **kwargs
+        )
+
+    def test_totals_and_null_key_group(self):
+        out = self._summary(sort=False)
+        uk = out.iloc[0]
+        self.assertEqual(uk["Country"], "UK")
+        self.assertAlmostEqual(uk["net_sales"], 50.0)
+        self.assertAlmostEqual(uk["cogs_net"], 27.0)
+        self.assertAlmostEqual(uk["gp_net"], 23.0)
+        self.assertEqual(uk["items_sold"], 6)
+        self.assertAlmostEqual(uk["gmv"], 60.0)
+        self.assertAlmostEqual(uk["returns_value"], 10.0)
+        self.assertEqual(uk["return_units_abs"], 1)
+        self.assertEqual(uk["orders"], 3)
+        self.assertEqual(uk["customers"], 2)
+        # País nulo: grupo propio; el cliente nulo no cuenta como distinto
+        null_key = out[out["Country"].isna()]
+        self.assertEqual(len(null_key), 1)
+        self.assertAlmostEqual(null_key["gmv"].iat[0], 100.0)
+        self.assertEqual(null_key["orders"].iat[0], 1)
+        self.assertEqual(null_key["customers"].iat[0], 0)
+
+    def test_returns_only_group_has_null_distinct_counts(self):
+        out = self._summary(sort=False)
+        fr = out[out["Country"] == "FR"].iloc[0]
+        self.assertAlmostEqual(fr["gmv"], 0.0)
+        self.assertEqual(fr["items_sold"], 0)
+        self.assertAlmostEqual(fr["returns_value"], 40.0)
+        self.assertEqual(fr["return_units_abs"], 2)
+        self.assertTrue(np.isnan(fr["orders"]))
+        self.assertTrue(np.isnan(fr["customers"]))
+
+    def test_returns_only_group_counts_zero_in_gold(self):
+        monthly = build_country_monthly(self.tx.fillna({"Country": "Unspecified"}))
+        fr = monthly[monthly["Country"] == "FR"].iloc[0]
+        self.assertEqual(fr["orders"], 0)
+        self.assertEqual(fr["customers"], 0)
+
+    def test_group_order(self):
+        unsorted = self._summary(sort=False)
+        self.assertEqual(unsorted["Country"].tolist()[:2], ["UK", "FR"])
+        self.assertTrue(pd.isna(unsorted["Country"].iat[2]))
+        ordered = self._summary(sort=True)
+        self.assertEqual(ordered["Country"].tolist()[:2], ["FR", "UK"])
+        self.assertTrue(pd.isna(ordered["Country"].iat[2]))
+
+    def test_multiple_keys_sort_false(self):
+        out = sales_returns_summary(self.tx, ["Country", "YearMonth"], sort=False)
+        keys = list(zip(out["Country"].fillna("-"), out["YearMonth"]))
+        self.assertEqual(
+            keys, [("UK", "2021-02"), ("FR", "2021-01"), ("-", "2021-01"), ("UK", "2021-01")]
+        )
+        self.assertEqual(out["items_sold"].tolist(), [5, 0, 4, 1])
+
+
+class GroupNuniqueTest(unittest.TestCase):
+    def test_counts_distinct_non_null_per_group(self):
+        codes = np.array([0, 0, 0, 2, 2, 2, 2])
+        values = np.array(["a", "a", "b", None, "c", "c", None], dtype=object)
+        # Grupo 1 sin filas y nulos ignorados, como groupby(...).nunique()
+        self.assertEqual(group_nunique(codes, values, 3).tolist(), [2, 0, 1])
+
+    def test_matches_groupby_nunique(self):
+        rng = np.random.default_rng(0)
+        codes = rng.integers(0, 5, 200)
+        values = pd.Series(rng.integers(0, 7, 200)).astype("float64").mask(rng.random(200) < 0.2)
+        expected = values.groupby(codes).nunique().reindex(range(6), fill_value=0)
+        self.assertEqual(group_nunique(codes, values.to_numpy(), 6).tolist(), expected.tolist())
+
+    def test_accepts_lists(self):
+        self.assertEqual(group_nunique([0, 0, 1], ["a", "b", "a"], 2).tolist(), [2, 1])
+
+    def test_all_null_values(self):
+        codes = np.array([0, 1])
+        values = np.array([None, None], dtype=object)
+        self.assertEqual(group_nunique(codes, values, 2).tolist(), [0, 0])
+
+
+class PctChangeSortedTest(unittest.TestCase):
+    def test_group_boundaries_and_non_finite(self):
+        values = [10.0, 20.0, 0.0, 5.0, 0.0, -10.0, 5.0, 7.0, 7.0]
+        groups = ["A", "A", "A", "A", "A", "B", "B", None, None]
+        out = pct_change_sorted(values, groups)
+        # A: inicio, +100 %, -100 %, 5/0 (inf) y 0/5 - 1; B: inicio y 5/-10 - 1; nulos: relleno
+        np.testing.assert_allclose(out, [0.0, 1.0, -1.0, 0.0, -1.0, 0.0, -1.5, 0.0, 0.0])
+
+    def test_zero_over_zero_and_nan_fill(self):
+        out = pct_change_sorted([0.0, 0.0, 3.0], ["A", "A", "A"], fill_value=np.nan)
+        self.assertTrue(np.isnan(out[0]))
+        self.assertTrue(np.isnan(out[1]))  # 0/0
+        self.assertTrue(np.isnan(out[2]))  # 3/0
+
+    def test_without_groups(self):
+        np.testing.assert_allclose(pct_change_sorted([2.0, 4.0, 1.0]), [0.0, 1.0, -0.75])
+
+    def test_matches_groupby_pct_change(self):
+        rng = np.random.default_rng(1)
+        df = pd.DataFrame(
+            {"g": np.sort(rng.integers(0, 6, 100)), "x": rng.normal(0, 10, 100).round(1)}
+        )
+        expected = (
+            df.groupby("g")["x"].pct_change().replace([np.inf, -np.inf], np.nan).fillna(0.0)
+        )
+        np.testing.assert_allclose(pct_change_sorted(df["x"], df["g"]), expected.to_numpy())
+
+
+class RoundInplaceTest(unittest.TestCase):
+    def test_read_only_buffer_is_not_modified(self):
+        values = np.array([1.2345, 2.3456, np.nan])
+        values.flags.writeable = False
+        df = pd.DataFrame({"a": values}, copy=False)
+        round_inplace(df, ["a"], 2, fill_value=0.0)
+        np.testing.assert_array_equal(df["a"].to_numpy(), [1.23, 2.35, 0.0])
+        # El buffer de solo lectura original queda intacto
+        np.testing.assert_array_equal(values, [1.2345, 2.3456, np.nan])
+
+    def test_nullable_float_keeps_dtype(self):
+        df = pd.DataFrame({"a": pd.array([1.2345, None], dtype="Float64")})
+        round_inplace(df, ["a"], 2)
+        self.assertEqual(df["a"].dtype, pd.Float64Dtype())
+        self.assertEqual(df["a"].iat[0], 1.23)
+        self.assertTrue(pd.isna(df["a"].iat[1]))
+        round_inplace(df, ["a"], 2, fill_value=0.0)
+        self.assertEqual(df["a"].tolist(), [1.23, 0.0])
+
+    def test_integer_columns_keep_dtype(self):
+        df = pd.DataFrame({"n": pd.array([1, None], dtype="Int64"), "i": [3, 4]})
+        round_inplace(df, ["n", "i"], 2)
+        self.assertTrue(pd.isna(df["n"].iat[1]))
+        # Como round().fillna(): solo se rellenan nulos, sin cambiar el tipo
+        round_inplace(df, ["n", "i"], 2, fill_value=0)
+        self.assertEqual(df["n"].dtype, pd.Int64Dtype())
+        self.assertEqual(df["n"].tolist(), [1, 0])
+        self.assertEqual(df["i"].dtype, np.int64)
+        self.assertEqual(df["i"].tolist(), [3, 4])
+
+    def test_infinities_survive_fill(self):
+        df = pd.DataFrame({"a": [np.inf, -np.inf, np.nan, 0.126]})
+        round_inplace(df, ["a"], 2, fill_value=0.0)
+        self.assertEqual(df["a"].tolist(), [np.inf, -np.inf, 0.0, 0.13])
+
+
+class YearMonthLabelsTest(unittest.TestCase):
+    def test_matches_to_period_with_nat(self):
+        dates = pd.Series(
+            pd.to_datetime(["2021-01-31 23:59", None, "2020-12-01 00:00", "2021-01-01 00:00", "1999-02-28 12:00"])
+        )
+        expected = dates.dt.to_period("M").astype(str)
+        self.assertEqual(year_month_labels(dates).tolist(), expected.tolist())
+        self.assertEqual(year_month_labels(dates)[1], "NaT")
+
+    def test_tz_aware_uses_local_month(self):
+        dates = pd.Series(pd.to_datetime(["2021-01-31 23:30", "2021-02-01 00:30"])).dt.tz_localize(
+            "Europe/Madrid"
+        )
+        self.assertEqual(year_month_labels(dates).tolist(), ["2021-01", "2021-02"])
+
+    def test_accepts_array_like(self):
+        labels = year_month_labels(np.array(["2021-03-15", "2021-03-01"], dtype="datetime64[ns]"))
+        self.assertEqual(labels.tolist(), ["2021-03", "2021-03"])
+        self.assertEqual(labels.dtype, object)
+
+
+if __name__ == "__main__":
+    unittest.main()
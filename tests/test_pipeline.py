@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import run_pipeline
+from pipeline.task import Task
+
+
+class CallEntrypointTest(unittest.TestCase):
+    def test_entrypoint_does_not_see_runner_argv(self):
+        seen = []
+
+        def fake_main():
+            seen.append(list(sys.argv))
+
+        argv = ["run_pipeline.py", "returns_tables", "--force"]
+        with patch.object(run_pipeline, "_resolve_entrypoint", return_value=fake_main), \
+                patch.object(sys, "argv", argv):
+            run_pipeline._call_entrypoint("gold.build_returns_tables:main")
+            self.assertEqual(seen, [["run_pipeline.py"]])
+            # Los argumentos del runner se restauran al terminar
+            self.assertIs(sys.argv, argv)
+
+
+class IncrementalTaskTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.inp = Path(tmp.name) / "input.parquet"
+        self.out = Path(tmp.name) / "output.parquet"
+
+    def _touch(self, path: Path, mtime_s: int) -> None:
+        path.write_bytes(b"")
+        os.utime(path, ns=(mtime_s * 10**9, mtime_s * 10**9))
+
+    def _task(self, incremental: bool = True) -> Task:
+        # Rutas absolutas: get_paths().base / ruta_absoluta == ruta_absoluta
+        return Task(
+            name="t",
+            run=Mock(),
+            inputs=[str(self.inp)],
+            outputs=[str(self.out)],
+            incremental=incremental,
+        )
+
+    def test_fresh_outputs_are_skipped(self):
+        self._touch(self.inp, 1_000)
+        self._touch(self.out, 2_000)
+        task = self._task()
+        task.execute()
+        task.run.assert_not_called()
+
+    def test_stale_outputs_are_rebuilt(self):
+        self._touch(self.inp, 2_000)
+        self._touch(self.out, 1_000)
+        task = self._task()
+        task.execute()
+        task.run.assert_called_once()
+
+    def test_missing_output_is_rebuilt(self):
+        self._touch(self.inp, 1_000)
+        task = self._task()
+        task.execute()
+        task.run.assert_called_once()
+
+    def test_force_rebuilds_fresh_outputs(self):
+        self._touch(self.inp, 1_000)
+        self._touch(self.out, 2_000)
+        task = self._task()
+        task.execute(force=True)
+        task.run.assert_called_once()
+
+    def test_not_incremental_by_default(self):
+        self._touch(self.inp, 1_000)
+        self._touch(self.out, 2_000)
+        task = Task(name="t", run=Mock(), inputs=[str(self.inp)], outputs=[str(self.out)])
+        task.execute()
+        task.run.assert_called_once()
+
+    def test_run_pipeline_force_overrides_incremental(self):
+        specs = {"a": {"entrypoint": "m:f", "inputs": [], "outputs": ["x"]}}
+        with patch.object(run_pipeline, "_load_config", return_value=specs), \
+                patch.object(run_pipeline, "_build_tasks", wraps=run_pipeline._build_tasks) as build, \
+                patch.object(Task, "execute"):
+            run_pipeline.run_pipeline(force=True, incremental=True)
+            run_pipeline.run_pipeline(incremental=True)
+        self.assertEqual(
+            [c.kwargs["incremental"] for c in build.call_args_list], [False, True]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()